@@ -1,3 +1,4 @@
+import collections
 import os
 import re
 from pathlib import Path
@@ -108,6 +109,54 @@ def get_mx_node_group_dict(mx_node_defs):
     return mx_node_group_dict
 
 
+def set_mx_data_library(doc, mx_library_doc):
+    """Make the definitions of a library document available to a document.
+    Since MaterialX 1.39 the document references the library, older versions have to import a copy of it.
+    """
+    if hasattr(doc, "setDataLibrary"):
+        doc.setDataLibrary(mx_library_doc)
+    else:
+        doc.importLibrary(mx_library_doc)
+
+
+# Lists of mx.NodeDef
+MxNodeDefDiff = collections.namedtuple("MxNodeDefDiff", ["added", "removed", "changed"])
+
+
+def get_mx_node_def_map(mx_node_defs):
+    """
+    Returns:
+        dict: {<nodedef name>: mx.NodeDef}
+    """
+    return {mx_node_def.getName(): mx_node_def for mx_node_def in mx_node_defs}
+
+
+def diff_mx_node_defs(previous_mx_node_defs, current_mx_node_defs):
+    """Compare two sets of node definitions by name. Definitions with the same name count as changed
+    if they have been loaded from a different file.
+
+    Args:
+        previous_mx_node_defs (dict): {<nodedef name>: mx.NodeDef} as returned by get_mx_node_def_map.
+        current_mx_node_defs (dict): {<nodedef name>: mx.NodeDef} as returned by get_mx_node_def_map.
+
+    Returns:
+        MxNodeDefDiff: added, removed and changed definitions.
+    """
+    added = []
+    changed = []
+    for name, mx_node_def in current_mx_node_defs.items():
+        previous_mx_node_def = previous_mx_node_defs.get(name)
+        if previous_mx_node_def is None:
+            added.append(mx_node_def)
+        elif previous_mx_node_def.getActiveSourceUri() != mx_node_def.getActiveSourceUri():
+            changed.append(mx_node_def)
+
+    removed = [
+        mx_node_def for name, mx_node_def in previous_mx_node_defs.items() if name not in current_mx_node_defs
+    ]
+    return MxNodeDefDiff(added, removed, changed)
+
+
 def get_displaytype_from_mx_def(mx_node_def):
     # return mx_node_def.getType()
 
@@ -129,3 +178,218 @@ def get_displaytype_from_mx_def(mx_node_def):
     mx_node_def_type = mx_node_def_full_name.replace(all_but_type_string, "")
 
     return mx_node_def_type
+
+
+# Name of the partition holding all graph elements which are not upstream of a material
+UNASSIGNED_PARTITION_NAME = "_unassigned"
+
+
+def is_mx_graph_element(mx_element):
+    """
+    Returns:
+        bool: True if the element is part of a material graph, False for definitions, typedefs, etc.
+    """
+    if mx_element.isA(mx.NodeGraph):
+        return not mx_element.hasAttribute("nodedef")
+
+    return mx_element.isA(mx.Node) or mx_element.isA(mx.Output)
+
+
+def get_upstream_mx_elements(mx_port, mx_scope):
+    """
+    Args:
+        mx_port (mx.PortElement): input or output whose connection is resolved.
+        mx_scope (mx.GraphElement): graph the port's element is located in.
+
+    Returns:
+        list(mx.Element): nodes or nodegraph outputs connected to the port.
+    """
+    nodegraph_name = mx_port.getNodeGraphString()
+    if nodegraph_name:
+        mx_nodegraph = mx_port.getDocument().getNodeGraph(nodegraph_name)
+        if not mx_nodegraph:
+            return []
+
+        output_name = mx_port.getOutputString()
+        if not output_name:
+            return list(mx_nodegraph.getOutputs())
+
+        mx_output = mx_nodegraph.getOutput(output_name)
+        return [mx_output] if mx_output else []
+
+    node_name = mx_port.getNodeName()
+    if node_name:
+        mx_node = mx_scope.getNode(node_name)
+        return [mx_node] if mx_node else []
+
+    return []
+
+
+def get_upstream_mx_graph_elements(mx_element):
+    """
+    Returns:
+        dict: {<name path>: mx.Element} of the element and all nodes and outputs upstream of it.
+    """
+    collected = {}
+    visited_nodegraphs = set()
+    stack = [mx_element]
+    while stack:
+        current = stack.pop()
+        name_path = current.getNamePath()
+        if name_path in collected:
+            continue
+
+        collected[name_path] = current
+        ports = [current] if current.isA(mx.Output) else current.getInputs()
+        for mx_port in ports:
+            stack.extend(get_upstream_mx_elements(mx_port, current.getParent()))
+
+        # The interface inputs of a nodegraph are exported with it and can be connected to elements outside of it
+        mx_parent = current.getParent()
+        if mx_parent.isA(mx.NodeGraph) and mx_parent.getNamePath() not in visited_nodegraphs:
+            visited_nodegraphs.add(mx_parent.getNamePath())
+            for mx_interface_input in mx_parent.getInputs():
+                stack.extend(get_upstream_mx_elements(mx_interface_input, mx_parent.getParent()))
+
+    return collected
+
+
+def _copy_mx_element(mx_parent, mx_element):
+    copied_element = mx_parent.addChildOfCategory(mx_element.getCategory(), mx_element.getName())
+    copied_element.copyContentFrom(mx_element)
+    return copied_element
+
+
+def create_mx_partition_doc(mx_doc, name_paths):
+    """Create a document with all non graph elements of mx_doc and the graph elements in name_paths.
+    Nodegraphs are only added with their interface and the requested children.
+    """
+    partition_doc = mx.createDocument()
+    for attr_name in mx_doc.getAttributeNames():
+        partition_doc.setAttribute(attr_name, mx_doc.getAttribute(attr_name))
+
+    for mx_element in mx_doc.getChildren():
+        if not is_mx_graph_element(mx_element):
+            _copy_mx_element(partition_doc, mx_element)
+        elif not mx_element.isA(mx.NodeGraph):
+            if mx_element.getNamePath() in name_paths:
+                _copy_mx_element(partition_doc, mx_element)
+        else:
+            children = [
+                child for child in mx_element.getChildren() if child.getNamePath() in name_paths
+            ]
+            if not children:
+                continue
+
+            partition_nodegraph = partition_doc.addChildOfCategory("nodegraph", mx_element.getName())
+            for attr_name in mx_element.getAttributeNames():
+                partition_nodegraph.setAttribute(attr_name, mx_element.getAttribute(attr_name))
+
+            for child in mx_element.getChildren():
+                if child.isA(mx.Input) or child.getNamePath() in name_paths:
+                    _copy_mx_element(partition_nodegraph, child)
+
+    return partition_doc
+
+
+def get_mx_material_partitions(mx_doc):
+    """Split the graph of a document by material, so every material can be translated on its own.
+
+    Returns:
+        dict: {<material name>: mx.Document} with the material and everything upstream of it.
+              Graph elements which are not upstream of any material are in UNASSIGNED_PARTITION_NAME.
+    """
+    partitions = {}
+    assigned_name_paths = set()
+    for mx_material in mx_doc.getMaterials():
+        name_paths = get_upstream_mx_graph_elements(mx_material)
+        assigned_name_paths.update(name_paths)
+        partitions[mx_material.getName()] = create_mx_partition_doc(mx_doc, name_paths)
+
+    unassigned_name_paths = set()
+    for mx_element in mx_doc.getChildren():
+        if not is_mx_graph_element(mx_element):
+            continue
+
+        graph_elements = mx_element.getChildren() if mx_element.isA(mx.NodeGraph) else [mx_element]
+        for graph_element in graph_elements:
+            name_path = graph_element.getNamePath()
+            if name_path not in assigned_name_paths and not graph_element.isA(mx.Input):
+                unassigned_name_paths.add(name_path)
+
+    if unassigned_name_paths:
+        partitions[UNASSIGNED_PARTITION_NAME] = create_mx_partition_doc(mx_doc, unassigned_name_paths)
+
+    return partitions
+
+
+# Attributes which only affect how a graph is presented in an editor
+MX_UI_ATTRIBUTES = {"xpos", "ypos", "width", "height", "uicolor", "uiname", "uifolder", "doc"}
+# Attributes connecting a port to another element
+MX_CONNECTION_ATTRIBUTES = ("nodename", "nodegraph", "output", "interfacename")
+
+
+def _get_mx_attributes(mx_element):
+    return tuple(
+        (attr_name, mx_element.getAttribute(attr_name))
+        for attr_name in sorted(mx_element.getAttributeNames())
+        if attr_name not in MX_UI_ATTRIBUTES
+    )
+
+
+MxGraphSignature = collections.namedtuple("MxGraphSignature", ["topology_hash", "values"])
+
+
+def get_mx_graph_signature(mx_doc):
+    """Describe everything of a document which is exported to the stage, split into its topology and its values.
+    All graph elements are included, as elements which are not upstream of a material are exported as well.
+    Ui attributes (eg. node positions) are ignored. Two documents with the same signature therefore only differ
+    in how they are presented in an editor, their material partitions are equal otherwise.
+
+    Returns:
+        MxGraphSignature: hash of the topology (elements, types, inputs and connections) and
+                          {<input name path>: attributes} of all unconnected inputs.
+    """
+    topology = [_get_mx_attributes(mx_doc)]
+    values = {}
+
+    graph_elements = []
+    for mx_element in mx_doc.getChildren():
+        if not is_mx_graph_element(mx_element):
+            topology.append((mx_element.getNamePath(), mx_element.asString()))
+        elif mx_element.isA(mx.NodeGraph):
+            graph_elements.append(mx_element)
+            graph_elements.extend(child for child in mx_element.getChildren() if not child.isA(mx.Input))
+        else:
+            graph_elements.append(mx_element)
+
+    for mx_element in graph_elements:
+        # includes the connection of outputs
+        topology.append((mx_element.getNamePath(), mx_element.getCategory(), _get_mx_attributes(mx_element)))
+        if mx_element.isA(mx.Output):
+            continue
+
+        # The interface inputs of nodegraphs can be connected or provide values, just like the inputs of nodes
+        for mx_input in mx_element.getInputs():
+            connection_attributes = tuple(mx_input.getAttribute(attr_name) for attr_name in MX_CONNECTION_ATTRIBUTES)
+            topology.append((mx_input.getNamePath(), mx_input.getType()) + connection_attributes)
+            if not any(connection_attributes):
+                values[mx_input.getNamePath()] = _get_mx_attributes(mx_input)
+
+    return MxGraphSignature(hash(tuple(topology)), values)
+
+
+def get_changed_mx_input_paths(previous_values, current_values):
+    """
+    Args:
+        previous_values (dict): values of a previous MxGraphSignature.
+        current_values (dict): values of the current MxGraphSignature.
+
+    Returns:
+        list(str): sorted name paths of the inputs whose value changed.
+    """
+    return sorted(
+        name_path
+        for name_path in set(previous_values) | set(current_values)
+        if previous_values.get(name_path) != current_values.get(name_path)
+    )
@@ -35,19 +35,22 @@ from qtpy.QtWidgets import (  # type: ignore
     QDockWidget,
     QFileDialog,
     QGridLayout,
+    QInputDialog,
     QLabel,
     QLineEdit,
     QMainWindow,
     QMenu,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QSizePolicy,
     QTextEdit,
     QVBoxLayout,
 )
 
-from QuiltiX import mx_node, qx_node, usd_render_settings, usd_stage, usd_stage_tree, usd_stage_view
+from QuiltiX import mx_node, qx_node, qx_profiler, usd_render_settings, usd_stage, usd_stage_tree, usd_stage_view
 from QuiltiX.constants import ROOT
+from QuiltiX.qx_library_watcher import MxLibraryWatcher
 from QuiltiX.qx_node_property import PropertiesBinWidget
 from QuiltiX.qx_nodegraph import QxNodeGraph
 
@@ -60,6 +63,8 @@ class QuiltiXWindow(QMainWindow):
         self.current_filepath = ""
         self.mx_selection_path = ""
         self.geometry_selection_path = ""
+        self.load_policy = usd_stage.LOAD_POLICY_ALL
+        self.load_pattern = ""
         self.hdri_selection_path = ""
         self.viewer_enabled = True
 
@@ -79,6 +84,8 @@ class QuiltiXWindow(QMainWindow):
             self.loadStylesheet()
 
         self.register_qx_nodes()
+        self.library_watcher = MxLibraryWatcher(parent=self)
+        self.library_watcher.libraries_changed.connect(self.on_mx_libraries_changed)
         self.set_current_filepath()
 
         if load_shaderball:
@@ -120,6 +127,17 @@ class QuiltiXWindow(QMainWindow):
         self.statusBar().setHidden(False)
         self.statusBar().addWidget(self.l_status)
 
+        self.stage_loader = None
+        self.pb_stage_load = QProgressBar()
+        self.pb_stage_load.setMaximumWidth(250)
+        self.pb_stage_load.setTextVisible(False)
+        self.pb_stage_load.setHidden(True)
+        self.statusBar().addPermanentWidget(self.pb_stage_load)
+        self.b_cancel_stage_load = QPushButton("Cancel")
+        self.b_cancel_stage_load.clicked.connect(self.cancel_stage_load)
+        self.b_cancel_stage_load.setHidden(True)
+        self.statusBar().addPermanentWidget(self.b_cancel_stage_load)
+
         self.setCorner(QtCore.Qt.TopRightCorner, QtCore.Qt.RightDockWidgetArea)
         self.setCorner(QtCore.Qt.TopLeftCorner, QtCore.Qt.LeftDockWidgetArea)
         self.setDockOptions(QMainWindow.AllowNestedDocks | QMainWindow.AllowTabbedDocks)
@@ -208,20 +226,33 @@ class QuiltiXWindow(QMainWindow):
         self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.properties_dock_widget)
         # endregion Properties
 
+        # region Profiler
+        self.profiler_widget = qx_profiler.ProfilerWidget()
+        self.profiler_dock_widget = QDockWidget()
+        self.profiler_dock_widget.setWindowTitle("Profiler")
+        self.profiler_dock_widget.setWidget(self.profiler_widget)
+        self.profiler_dock_widget.setAllowedAreas(QtCore.Qt.AllDockWidgetAreas)
+        self.profiler_dock_widget.setHidden(True)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.profiler_dock_widget)
+        # endregion Profiler
+
         # region Events
         self.qx_node_graph.node_graph_changed.connect(self.on_node_graph_changed)
         self.qx_node_graph.mx_data_updated.connect(self.stage_ctrl.refresh_mx_file)
         # TODO: mx_parameter_changed should maybe emit this? This would help decouple usd_stage from qx_node
         # QxNode.get_mx_input_name_from_property_name(qx_node, property_name)
         self.qx_node_graph.mx_parameter_changed.connect(self.stage_ctrl.update_parameter)
+        self.stage_ctrl.signal_parameter_update_failed.connect(self.qx_node_graph.reset_synced_graph_signature)
+        # Parameter updates are only written to the session layer of the current stage
+        self.stage_ctrl.signal_stage_changed.connect(self.qx_node_graph.reset_synced_graph_signature)
         self.qx_node_graph.mx_file_loaded.connect(self.on_mx_file_loaded)
 
         if self.viewer_enabled:
             self.stage_ctrl.signal_stage_changed.connect(self.stage_view_widget.set_stage)
-            self.stage_ctrl.signal_stage_updated.connect(self.stage_view_widget.view.updateGL)
+            self.stage_ctrl.signal_stage_updated.connect(self.stage_view_widget.request_redraw)
 
+        # The stage tree listens to Usd.Notice.ObjectsChanged itself and only updates resynced prims
         self.stage_ctrl.signal_stage_changed.connect(self.stage_tree_widget.set_stage)
-        self.stage_ctrl.signal_stage_updated.connect(self.stage_tree_widget.refresh_tree)
         # endregion Events
 
         self.setCentralWidget(self.qx_node_graph_widget)
@@ -233,7 +264,6 @@ class QuiltiXWindow(QMainWindow):
         self.stage_ctrl.refresh_mx_file(graph_data, emit=False)
         if self.act_apply_mat.isChecked():
             self.stage_ctrl.apply_first_material_to_all_prims()
-        self.stage_tree_widget.refresh_tree()
         self.hide_node_defs()
 
     def on_node_graph_changed(self, nodegraph):
@@ -263,8 +293,7 @@ class QuiltiXWindow(QMainWindow):
 
     def set_stage(self, stage):
         self.stage_ctrl.set_stage(stage)
-        self.qx_node_graph.update_mx_xml_data_from_graph()
-        self.stage_tree_widget.refresh_tree()
+        self.qx_node_graph.update_mx_xml_data_from_graph(force=True)
 
     def apply_material(self, mat_type, selection=False):
         if mat_type == "surface":
@@ -307,6 +336,7 @@ class QuiltiXWindow(QMainWindow):
             os.environ["PXR_MTLX_PLUGIN_SEARCH_PATHS"] = os.getenv("PXR_MTLX_PLUGIN_SEARCH_PATHS", "") + os.pathsep + dirpath
 
         self.qx_node_graph.load_mx_libraries(library_path=dirpath)
+        self.library_watcher.add_library_path(dirpath)
 
     def init_menu_bar(self):
         # region Tabs
@@ -405,6 +435,23 @@ class QuiltiXWindow(QMainWindow):
         self.act_reload_defs = QAction("Reload Node Definitions", self)
         self.act_reload_defs.triggered.connect(self.reload_defs)
         self.options_menu.addAction(self.act_reload_defs)
+
+        self.menu_load_policy = QMenu("Geometry Payload Loading", self)
+        self.grp_load_policy = QActionGroup(self, exclusive=True)
+        for text, load_policy in [
+            ("Load All", usd_stage.LOAD_POLICY_ALL),
+            ("Load None", usd_stage.LOAD_POLICY_NONE),
+            ("Load Matching Pattern...", usd_stage.LOAD_POLICY_PATTERN),
+        ]:
+            act_load_policy = QAction(text, self)
+            act_load_policy.setCheckable(True)
+            act_load_policy.setChecked(load_policy == self.load_policy)
+            act_load_policy.setData(load_policy)
+            self.grp_load_policy.addAction(act_load_policy)
+            self.menu_load_policy.addAction(act_load_policy)
+
+        self.grp_load_policy.triggered.connect(self.on_load_policy_triggered)
+        self.options_menu.addMenu(self.menu_load_policy)
         # endregion Options
 
         # region View
@@ -421,7 +468,6 @@ class QuiltiXWindow(QMainWindow):
             self.act_hdri.setCheckable(True)
             self.act_hdri.setChecked(True)
             self.act_hdri.toggled.connect(self.stage_view_widget.set_hdri_enabled)
-            self.act_hdri.toggled.connect(lambda x: self.stage_tree_widget.refresh_tree())
             self.view_menu.addAction(self.act_hdri)
             self.view_menu.addSeparator()
 
@@ -446,6 +492,11 @@ class QuiltiXWindow(QMainWindow):
         self.act_viewport.toggled.connect(self.on_viewport_toggled)
         if self.viewer_enabled:
             self.view_menu.addAction(self.act_viewport)
+
+        self.act_profiler = QAction("Profiler", self)
+        self.act_profiler.setCheckable(True)
+        self.act_profiler.toggled.connect(self.on_profiler_toggled)
+        self.view_menu.addAction(self.act_profiler)
         # endregion View
 
         # region About
@@ -492,12 +543,13 @@ class QuiltiXWindow(QMainWindow):
         self.act_update = QAction(update_icon, "", self)
         self.act_update.setShortcut(QtGui.QKeySequence(QtCore.Qt.Key_F5))
         self.menuBar().addAction(self.act_update)
-        self.act_update.triggered.connect(self.qx_node_graph.update_mx_xml_data_from_graph)
+        self.act_update.triggered.connect(lambda: self.qx_node_graph.update_mx_xml_data_from_graph(force=True))
         # endregion Update
 
     def on_view_menu_showing(self):
         self.act_prop.setChecked(self.properties_dock_widget.isVisible())
         self.act_scenegraph.setChecked(self.stage_tree_dock_widget.isVisible())
+        self.act_profiler.setChecked(self.profiler_dock_widget.isVisible())
         self.act_render_settings.setChecked(self.render_settings_dock_widget.isVisible())
         if self.viewer_enabled:
             self.act_viewport.setChecked(self.stage_view_dock_widget.isVisible())
@@ -687,10 +739,8 @@ class QuiltiXWindow(QMainWindow):
         base, ext = os.path.splitext(filepath)
         if ext in [".hdr", ".hdri", ".exr", ".jpg", ".png"]:
             self.stage_view_widget.set_hdri(filepath)
-            self.stage_tree_widget.refresh_tree()
         elif ext in [".usd", ".usda", ".usdc"]:
-            loaded_stage = usd_stage.get_stage_from_file(filepath)
-            self.set_stage(loaded_stage)
+            self.load_stage_async(filepath)
             # self.fix_geo(self.stage_tree_widget.invisibleRootItem())
 
     def load_geometry_triggered(self):
@@ -710,10 +760,95 @@ class QuiltiXWindow(QMainWindow):
             return
 
         self.geometry_selection_path = path
-        loaded_stage = usd_stage.get_stage_from_file(path)
-        self.set_stage(loaded_stage)
+        self.load_stage_async(path)
         # self.fix_geo(self.stage_tree_widget.invisibleRootItem())
 
+    def load_stage_async(self, path):
+        """Open the stage on a worker thread and set it once it is fully loaded."""
+        # replaces the running load
+        self._stop_stage_loader()
+
+        self.stage_loader = usd_stage.StageLoader(
+            path, load_policy=self.load_policy, load_pattern=self.load_pattern, parent=self
+        )
+        self.stage_loader.progress_changed.connect(self.on_stage_load_progress)
+        self.stage_loader.stage_loaded.connect(self.on_stage_loaded)
+        self.stage_loader.load_failed.connect(self.on_stage_load_failed)
+        self.stage_loader.finished.connect(self.on_stage_loader_finished)
+        # cancelled loaders keep running until Usd is done, so they clean up after themselves
+        self.stage_loader.finished.connect(self.stage_loader.deleteLater)
+        self.pb_stage_load.setRange(0, 0)
+        self.pb_stage_load.setHidden(False)
+        self.b_cancel_stage_load.setHidden(False)
+        self.stage_loader.start()
+
+    def on_load_policy_triggered(self, action):
+        load_policy = action.data()
+        if load_policy == usd_stage.LOAD_POLICY_PATTERN:
+            load_pattern, accepted = QInputDialog.getText(
+                self, "Load Matching Pattern", "Prim path pattern of the payloads to load:", text=self.load_pattern
+            )
+            if not accepted:
+                # restore the previous policy
+                for act_load_policy in self.grp_load_policy.actions():
+                    act_load_policy.setChecked(act_load_policy.data() == self.load_policy)
+
+                return
+
+            self.load_pattern = load_pattern
+
+        self.load_policy = load_policy
+
+    def cancel_stage_load(self):
+        if not self.stage_loader:
+            return
+
+        logger.info(f"Cancelled loading {self.stage_loader.path}")
+        self._stop_stage_loader()
+
+    def _stop_stage_loader(self):
+        if not self.stage_loader:
+            return
+
+        self.stage_loader.cancel()
+        self.stage_loader = None
+        self.reset_stage_load_progress()
+
+    def on_stage_load_progress(self, value, maximum, message):
+        if self.sender() is not self.stage_loader:
+            return
+
+        # A maximum of 0 shows a busy indicator
+        self.pb_stage_load.setRange(0, maximum)
+        self.pb_stage_load.setValue(value)
+        self.statusBar().showMessage(message)
+
+    def on_stage_loaded(self, stage):
+        loader = self.sender()
+        if loader is not self.stage_loader or loader.cancelled:
+            return
+
+        logger.info(f"Loaded stage {loader.path}")
+        self.set_stage(stage)
+
+    def on_stage_load_failed(self, error):
+        if self.sender() is not self.stage_loader:
+            return
+
+        QMessageBox.warning(self, "QuiltiX", f"Failed to load {self.stage_loader.path}:\n\n{error}")
+
+    def on_stage_loader_finished(self):
+        if self.sender() is not self.stage_loader:
+            return
+
+        self.stage_loader = None
+        self.reset_stage_load_progress()
+
+    def reset_stage_load_progress(self):
+        self.pb_stage_load.setHidden(True)
+        self.b_cancel_stage_load.setHidden(True)
+        self.statusBar().clearMessage()
+
     def load_hdri_triggered(self):
         start_path = self.hdri_selection_path
         if not start_path:
@@ -732,7 +867,6 @@ class QuiltiXWindow(QMainWindow):
 
         self.hdri_selection_path = path
         self.stage_view_widget.set_hdri(path)
-        self.stage_tree_widget.refresh_tree()
 
     def on_properties_toggled(self, checked):
         self.properties_dock_widget.setVisible(checked)
@@ -747,6 +881,9 @@ class QuiltiXWindow(QMainWindow):
     def on_viewport_toggled(self, checked):
         self.stage_view_dock_widget.setVisible(checked)
 
+    def on_profiler_toggled(self, checked):
+        self.profiler_dock_widget.setVisible(checked)
+
     def open_mx_homepage_triggered(self):
         url = "https://www.materialx.org"
         webbrowser.open(url)
@@ -790,6 +927,15 @@ class QuiltiXWindow(QMainWindow):
     def reload_defs(self):
         self.qx_node_graph.unregister_nodes()
         self.register_qx_nodes()
+        self.library_watcher.refresh()
+
+    def on_mx_libraries_changed(self, paths):
+        diff = self.qx_node_graph.reload_mx_library_files(paths)
+        self.l_status.setText(
+            f"Reloaded node definitions: {len(diff.added)} added, {len(diff.removed)} removed, "
+            f"{len(diff.changed)} changed"
+        )
+        self.hide_node_defs()
 
     def request_filepath(
         self, title="Select File", start_path="", parent=None, file_filter="All files (*.*)", mode="open"
@@ -815,6 +961,10 @@ class QuiltiXWindow(QMainWindow):
 
         self.stage_ctrl.about_to_close()
 
+        for stage_loader in self.findChildren(usd_stage.StageLoader):
+            stage_loader.cancel()
+            stage_loader.wait()
+
     def fix_geo(self, item, emit=True):
         if hasattr(item, "prim"):
             prim = item.prim
@@ -0,0 +1,112 @@
+import logging
+import os
+
+from qtpy import QtCore  # type: ignore
+
+from QuiltiX import mx_node
+
+logger = logging.getLogger(__name__)
+
+# Time to wait for further file changes before reporting them, editors often save files in several steps
+CHANGE_DELAY_MS = 300
+
+
+class MxLibraryWatcher(QtCore.QObject):
+    # list of added, modified or deleted .mtlx file paths
+    libraries_changed = QtCore.Signal(list)
+
+    def __init__(self, get_search_paths=None, parent=None):
+        """Watches the .mtlx files in the custom library search paths and reports which of them changed.
+        Changes are detected by comparing modification times, so files replaced by editors are picked up as well.
+
+        Args:
+            get_search_paths (callable, optional): returns the directories to watch.
+                Defaults to the library paths of PXR_MTLX_PLUGIN_SEARCH_PATHS at construction and the ones added with
+                add_library_path. Directories added to PXR_MTLX_PLUGIN_SEARCH_PATHS later on, fe. the ones of
+                material files with embedded definitions, are not watched.
+            parent (QObject, optional): parent object.
+        """
+        super(MxLibraryWatcher, self).__init__(parent)
+        self._library_paths = mx_node.get_mx_custom_lib_paths()
+        self._get_search_paths = get_search_paths or self.get_library_paths
+        self._mtimes = {}
+
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_path_changed)
+        self._watcher.directoryChanged.connect(self._on_path_changed)
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(CHANGE_DELAY_MS)
+        self._timer.timeout.connect(self.check_for_changes)
+
+        self.refresh()
+
+    def get_library_paths(self):
+        return list(self._library_paths)
+
+    def add_library_path(self, path):
+        """Start watching a directory holding definitions, fe. after saving a new definition into it."""
+        path = os.path.normpath(path)
+        if path not in self._library_paths:
+            self._library_paths.append(path)
+
+        self.refresh()
+
+    def refresh(self):
+        """Start watching search paths which have been added since the last call.
+        The files found in them are considered as already loaded.
+        """
+        mtimes, directories = self._scan()
+        for path, mtime in mtimes.items():
+            self._mtimes.setdefault(path, mtime)
+
+        self._watch(directories, mtimes)
+
+    def check_for_changes(self):
+        """
+        Returns:
+            list: paths of the .mtlx files which have been added, modified or deleted since the last check.
+        """
+        self._timer.stop()
+        mtimes, directories = self._scan()
+        changed_paths = sorted(
+            path for path in set(mtimes) | set(self._mtimes) if mtimes.get(path) != self._mtimes.get(path)
+        )
+        self._mtimes = mtimes
+        self._watch(directories, mtimes)
+        if changed_paths:
+            logger.debug(f"changed library files: {changed_paths}")
+            self.libraries_changed.emit(changed_paths)
+
+        return changed_paths
+
+    def _on_path_changed(self, path):
+        self._timer.start()
+
+    def _scan(self):
+        mtimes = {}
+        directories = []
+        for search_path in self._get_search_paths():
+            for dirpath, _, filenames in os.walk(search_path):
+                directories.append(os.path.normpath(dirpath))
+                for filename in filenames:
+                    if not filename.endswith(".mtlx"):
+                        continue
+
+                    filepath = os.path.normpath(os.path.join(dirpath, filename))
+                    try:
+                        mtimes[filepath] = os.path.getmtime(filepath)
+                    except OSError:
+                        continue
+
+        return mtimes, directories
+
+    def _watch(self, directories, files):
+        paths = set(directories) | set(files)
+        watched_paths = set(self._watcher.files()) | set(self._watcher.directories())
+        if obsolete_paths := watched_paths - paths:
+            self._watcher.removePaths(list(obsolete_paths))
+
+        if new_paths := paths - watched_paths:
+            self._watcher.addPaths(list(new_paths))
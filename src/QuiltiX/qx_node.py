@@ -1,3 +1,4 @@
+import collections
 import random
 import logging
 
@@ -11,6 +12,7 @@ from NodeGraphQt.constants import (
     NodePropWidgetEnum,
     PortTypeEnum,
 )
+from NodeGraphQt.base.model import NodeModel
 from NodeGraphQt.nodes.port_node import PortInputNode, PortOutputNode
 
 from QuiltiX import mx_node
@@ -28,6 +30,17 @@ MULTI_TYPE_PROPERTY_NAMES = [
     "default2",
 ]
 
+# Properties can't be named like the default node properties, inputs with such a name get a suffix
+DEFAULT_PROPERTY_NAMES = frozenset(NodeModel().properties)
+
+# Ports and properties of a node for a single MaterialX definition. Computed once per definition and shared
+# between all nodes, so the values must not be modified.
+MxInputSchema = collections.namedtuple(
+    "MxInputSchema", ["name", "property_name", "mx_type", "value", "widget_type", "range", "color"]
+)
+MxOutputSchema = collections.namedtuple("MxOutputSchema", ["name", "mx_type", "color"])
+MxDefSchema = collections.namedtuple("MxDefSchema", ["inputs", "outputs"])
+
 
 class QxNodeBase(BaseNode):
     def __init__(self, qgraphics_item=None, node_graph=None):
@@ -79,6 +92,16 @@ class QxNodeBase(BaseNode):
 
 class QxNode(QxNodeBase):
     possible_mx_defs = None
+    # MxDefSchema per key of possible_mx_defs
+    mx_def_schemas = None
+    # keys of possible_mx_defs by the type of the first input / output of the definition
+    mx_def_types_by_input_type = None
+    mx_def_types_by_output_type = None
+    # types a port can have over all definitions, by ("in" | "out", port name)
+    mx_port_types = None
+    # types of all inputs / outputs over all definitions
+    mx_input_types = None
+    mx_output_types = None
 
     def __init__(self, node_type=None, node_graph=None):
         super(QxNode, self).__init__(node_graph)
@@ -90,12 +113,14 @@ class QxNode(QxNodeBase):
         self.model._custom_prop = {}
 
         if node_type is None:
-            self.current_mx_def = next(iter(self.possible_mx_defs.values()))
+            node_type = next(iter(self.possible_mx_defs))
             self.add_type_property()
         else:
-            self.current_mx_def = self.possible_mx_defs[node_type]
             self.add_type_property(current_type_name=node_type)
 
+        self.current_mx_def_type = node_type
+        self.current_mx_def = self.possible_mx_defs[node_type]
+
         self.initialize_type()
         logger.debug(f"Initialized {self.NODE_NAME} of type {self.type_}")
 
@@ -210,23 +235,97 @@ class QxNode(QxNodeBase):
 
     def initialize_type(self):
         # TODO: overhaul type conversion
-        for mx_input in self.current_mx_def.getActiveInputs():
-            color = self._random_color_from_string(mx_input.getType())
-            self.add_input(mx_input.getName(), color=color)
-            self.__class__.create_property_from_mx_input(mx_input, self)
+        mx_def_schema = self.get_mx_def_schema(self.current_mx_def_type)
+        for input_schema in mx_def_schema.inputs:
+            self.add_input(input_schema.name, color=input_schema.color)
+            self.create_property(
+                input_schema.property_name,
+                input_schema.value,
+                widget_type=input_schema.widget_type,
+                range=input_schema.range,
+            )
 
-        for mx_output in self.current_mx_def.getActiveOutputs():
-            # TODO: actively chose colors instead of random
-            color = self._random_color_from_string(str(mx_output.getType()))
-            mx_output_name = mx_output.getName()
-            self.add_output(mx_output_name, color=color)
+        for output_schema in mx_def_schema.outputs:
+            self.add_output(output_schema.name, color=output_schema.color)
 
         self.refresh_port_tooltips()
 
+    def get_mx_def_schema(self, mx_def_type):
+        mx_def_schemas = self.mx_def_schemas
+        if mx_def_schemas is None:
+            mx_def_schemas = self.__class__.mx_def_schemas = {}
+
+        mx_def_schema = mx_def_schemas.get(mx_def_type)
+        if mx_def_schema is None:
+            mx_def_schema = self.create_mx_def_schema(mx_def_type, self.possible_mx_defs[mx_def_type])
+            mx_def_schemas[mx_def_type] = mx_def_schema
+
+        return mx_def_schema
+
+    @classmethod
+    def create_mx_def_schema(cls, mx_def_type, mx_def):
+        """Precompute the ports and properties a node gets for a MaterialX definition.
+
+        Args:
+            mx_def_type (str): key of the definition in possible_mx_defs.
+            mx_def (mx.NodeDef): definition to create the schema for.
+
+        Returns:
+            MxDefSchema: inputs and outputs of the definition.
+        """
+        inputs = []
+        for mx_input in mx_def.getActiveInputs():
+            mx_input_name = mx_input.getName()
+            mx_input_type = mx_input.getType()
+            value, value_range = cls.get_property_value_from_mx_input(mx_input)
+            inputs.append(
+                MxInputSchema(
+                    mx_input_name,
+                    cls.get_property_name_from_mx_def_type(mx_def_type, mx_input_name),
+                    mx_input_type,
+                    value,
+                    cls.get_widget_type_from_mx_type(mx_input_type),
+                    value_range,
+                    cls._random_color_from_string(mx_input_type),
+                )
+            )
+
+        outputs = []
+        for mx_output in mx_def.getActiveOutputs():
+            # TODO: actively chose colors instead of random
+            mx_output_type = str(mx_output.getType())
+            outputs.append(
+                MxOutputSchema(mx_output.getName(), mx_output_type, cls._random_color_from_string(mx_output_type))
+            )
+
+        return MxDefSchema(tuple(inputs), tuple(outputs))
+
+    @staticmethod
+    def get_property_name_from_mx_def_type(mx_def_type, mx_input_name):
+        if mx_input_name in MULTI_TYPE_PROPERTY_NAMES:
+            return ".".join((mx_def_type, mx_input_name))
+        elif mx_input_name in DEFAULT_PROPERTY_NAMES:
+            return mx_input_name + "0"
+
+        return mx_input_name
+
     @classmethod
     def create_property_from_mx_input(cls, mx_input, node):
+        mx_input_value, value_range = cls.get_property_value_from_mx_input(mx_input)
+        widget_type = cls.get_widget_type_from_mx_type(mx_input.getType())
+        property_name = cls.get_property_name_from_mx_input(node, mx_input.getName())
+        node.create_property(
+            property_name, mx_input_value, widget_type=widget_type, range=value_range
+        )
+
+    @staticmethod
+    def get_property_value_from_mx_input(mx_input):
+        """
+        Returns:
+            tuple: default value and value range of the property for a MaterialX input. Sequences are returned
+                as tuples, as the values are shared between nodes.
+        """
         mx_input_value = mx_input.getValue()
-        mx_input_name = mx_input.getName()
         mx_input_type = mx_input.getType()
         value_range = None
 
@@ -241,37 +340,37 @@ class QxNode(QxNodeBase):
                 "color3": mx.PyMaterialXCore.Vector3,
                 "color4": mx.PyMaterialXCore.Vector4
             }
-            mx_input_value = list(color_type_map[mx_input_type](mx_input_value))
+            mx_input_value = tuple(color_type_map[mx_input_type](mx_input_value))
         elif mx_input_value and "vector" in mx_input_type.lower():
-            mx_input_value = [i for i in mx_input_value]
+            mx_input_value = tuple(mx_input_value)
+        elif isinstance(mx_input_value, list):
+            mx_input_value = tuple(mx_input_value)
 
-        # TODO: actively chose colors instead of random
-        widget_type = cls.get_widget_type_from_mx_type(mx_input_type)
         if mx_input_type == "float":
             if mx_input_value is None:
                 mx_input_value = 0
             if value_range:
-                value_range = [float(i) for i in value_range]
+                value_range = tuple(float(i) for i in value_range)
         elif mx_input_type == "integer":
             if mx_input_value is None:
                 mx_input_value = 0
             if value_range:
-                value_range = [int(i) for i in value_range]
+                value_range = tuple(int(i) for i in value_range)
         elif mx_input_type == "vector2":
             if mx_input_value is None:
-                mx_input_value = [0, 0]
+                mx_input_value = (0, 0)
         elif mx_input_type == "vector3":
             if mx_input_value is None:
-                mx_input_value = [0, 0, 0]
+                mx_input_value = (0, 0, 0)
         elif mx_input_type == "vector4":
             if mx_input_value is None:
-                mx_input_value = [0, 0, 0, 0]
+                mx_input_value = (0, 0, 0, 0)
         elif mx_input_type == "color3":
             if mx_input_value is None:
-                mx_input_value = [0, 0, 0]
+                mx_input_value = (0, 0, 0)
         elif mx_input_type == "color4":
             if mx_input_value is None:
-                mx_input_value = [0, 0, 0, 1]
+                mx_input_value = (0, 0, 0, 1)
         elif mx_input_type == "filename":
             if mx_input_value is None:
                 mx_input_value = ""
@@ -279,10 +378,7 @@ class QxNode(QxNodeBase):
             if mx_input_value is None:
                 mx_input_value = ""
 
-        property_name = cls.get_property_name_from_mx_input(node, mx_input_name)
-        node.create_property(
-            property_name, mx_input_value, widget_type=widget_type, range=value_range
-        )
+        return mx_input_value, value_range
 
     def get_mx_def_name_from_data_type(self, data_type, from_port="in"):
         if from_port not in ["in", "out"]:
@@ -291,38 +387,90 @@ class QxNode(QxNodeBase):
         if data_type in self.possible_mx_defs:
             return data_type
 
-        # Check additionally for matching types in the first output
+        # Check additionally for matching types in the first input / output
         if from_port == "in":
-            mx_def_type_name_to_port_data_type_map = {
-                mx_def_name: mx_def.getInputs()[0].getType()
-                for mx_def_name, mx_def in self.possible_mx_defs.items()
-                if mx_def.getInputs()
-            }
+            possible_type_names = self.mx_def_types_by_input_type.get(data_type)
         elif from_port == "out":
-            mx_def_type_name_to_port_data_type_map = {
-                mx_def_name: mx_def.getOutputs()[0].getType()
-                for mx_def_name, mx_def in self.possible_mx_defs.items()
-                if mx_def.getOutputs()
-            }
+            possible_type_names = self.mx_def_types_by_output_type.get(data_type)
 
-        if data_type not in mx_def_type_name_to_port_data_type_map.values():
+        if not possible_type_names:
             logger.warn(f"Could not find definition of type {data_type} for node {self.name()}")
             return
-        else:
-            # There can be multiple mx defs that match. Make a "good" guess with the first one we find :)
-            possible_type_names = [
-                mx_def_name
-                for mx_def_name, mx_def_type_name in mx_def_type_name_to_port_data_type_map.items()
-                if mx_def_type_name == data_type
-            ]
-            data_type = possible_type_names[0]
-            return data_type
+
+        # There can be multiple mx defs that match. Make a "good" guess with the first one we find :)
+        return possible_type_names[0]
+
+    @staticmethod
+    def create_mx_def_lookups(possible_mx_defs):
+        """Precompute the lookups from port types to definitions of a node class.
+
+        Args:
+            possible_mx_defs (dict): definitions of the node class by their display type.
+
+        Returns:
+            dict: class attributes with the lookups.
+        """
+        mx_def_types_by_input_type = {}
+        mx_def_types_by_output_type = {}
+        mx_port_types = {}
+        mx_input_types = set()
+        mx_output_types = set()
+        for mx_def_type, mx_def in possible_mx_defs.items():
+            mx_inputs = mx_def.getInputs()
+            if mx_inputs:
+                mx_def_types_by_input_type.setdefault(mx_inputs[0].getType(), []).append(mx_def_type)
+
+            mx_outputs = mx_def.getOutputs()
+            if mx_outputs:
+                mx_def_types_by_output_type.setdefault(mx_outputs[0].getType(), []).append(mx_def_type)
+
+            for mx_input in mx_def.getActiveInputs():
+                mx_input_types.add(mx_input.getType())
+                port_types = mx_port_types.setdefault(("in", mx_input.getName()), [])
+                if mx_input.getType() not in port_types:
+                    port_types.append(mx_input.getType())
+
+            for mx_output in mx_def.getActiveOutputs():
+                mx_output_types.add(mx_output.getType())
+                port_types = mx_port_types.setdefault(("out", mx_output.getName()), [])
+                if mx_output.getType() not in port_types:
+                    port_types.append(mx_output.getType())
+
+        return {
+            "mx_def_types_by_input_type": {k: tuple(v) for k, v in mx_def_types_by_input_type.items()},
+            "mx_def_types_by_output_type": {k: tuple(v) for k, v in mx_def_types_by_output_type.items()},
+            "mx_port_types": {k: tuple(v) for k, v in mx_port_types.items()},
+            "mx_input_types": frozenset(mx_input_types),
+            "mx_output_types": frozenset(mx_output_types),
+        }
+
+    def set_mx_defs_from_node_class(self, node_class):
+        """Use the definitions and lookups of another class of the same node type, fe. after reloading a library."""
+        self.possible_mx_defs = node_class.possible_mx_defs
+        self.mx_def_schemas = node_class.mx_def_schemas
+        self.mx_def_types_by_input_type = node_class.mx_def_types_by_input_type
+        self.mx_def_types_by_output_type = node_class.mx_def_types_by_output_type
+        self.mx_port_types = node_class.mx_port_types
+        self.mx_input_types = node_class.mx_input_types
+        self.mx_output_types = node_class.mx_output_types
 
     def change_type(self, type_name):
         if type_name not in self.possible_mx_defs:
             logger.warn(f"Could not find definition of type {type_name} for node {self.name()}")
             return
 
+        if not self.graph:
+            self._change_type(type_name)
+            return
+
+        # Restoring values and connections would otherwise update the stage once per property and connection
+        with self.graph.transaction():
+            self._change_type(type_name)
+            self.graph.bump_revision()
+            if self.graph.get_root_graph().auto_update_ng:
+                self.graph.update_mx_xml_data_from_graph()
+
+    def _change_type(self, type_name):
         # Store connections & values for them to be restored later
         original_values = self.properties()["custom"]
         original_mx_def = self.current_mx_def
@@ -336,6 +484,7 @@ class QxNode(QxNodeBase):
         for p in self.output_ports():
             p.clear_connections()
 
+        self.current_mx_def_type = type_name
         self.current_mx_def = self.possible_mx_defs[type_name]
 
         # Remove current node data
@@ -473,15 +622,7 @@ class QxNode(QxNodeBase):
         # 'width', 'height', 'pos', 'inputs', 'outputs',
         # 'port_deletion_allowed', 'subgraph_session']
         if mx_input_name in MULTI_TYPE_PROPERTY_NAMES:
-            prefix = next(
-                (
-                    mx_def_type
-                    for mx_def_type, mx_def in self.possible_mx_defs.items()
-                    if mx_def == self.current_mx_def
-                ),
-                None,
-            )
-            property_name = ".".join((prefix, mx_input_name))
+            property_name = ".".join((self.current_mx_def_type, mx_input_name))
         elif mx_input_name in self.model.properties.keys():
             property_name = mx_input_name + "0"
         else:
@@ -1002,14 +1143,16 @@ def qx_node_from_mx_node_group_dict_generator(mx_node_defs):
     for mx_node_group, mx_node_def_name_dict in grp_dict.items():
         for mx_node_def_name, mx_node_defs in mx_node_def_name_dict.items():
             label = f"{mx_node_group.capitalize()}.{mx_node_def_name.capitalize()}"
-            qx_node = type(
-                mx_node_def_name.capitalize(),
-                (QxNode,),
-                {
-                    "NODE_NAME": mx_node_def_name.capitalize(),
-                    "__identifier__": mx_node_group.capitalize(),
-                    "__label__": label,
-                    "possible_mx_defs": mx_node_defs,
+            class_attributes = {
+                "NODE_NAME": mx_node_def_name.capitalize(),
+                "__identifier__": mx_node_group.capitalize(),
+                "__label__": label,
+                "possible_mx_defs": mx_node_defs,
+                "mx_def_schemas": {
+                    mx_def_type: QxNode.create_mx_def_schema(mx_def_type, mx_def)
+                    for mx_def_type, mx_def in mx_node_defs.items()
                 },
-            )
+            }
+            class_attributes.update(QxNode.create_mx_def_lookups(mx_node_defs))
+            qx_node = type(mx_node_def_name.capitalize(), (QxNode,), class_attributes)
             yield qx_node
@@ -1,5 +1,5 @@
 import logging
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 from NodeGraphQt.constants import NodePropWidgetEnum
 from NodeGraphQt.custom_widgets.properties_bin import (
@@ -16,13 +16,18 @@ from qtpy.QtWidgets import (  # type: ignore
     QTableWidgetItem,
     QTabWidget,
     QVBoxLayout,
+    QWidget,
 )
 
 from QuiltiX import constants
+from QuiltiX.qx_profiler import timed
 from QuiltiX.qx_node_property_widgets import QxPropColorPickerRGBAFloat, QxPropColorPickerRGBFloat, QxPropFilePath
 
 logger = logging.getLogger(__name__)
 
+# Maximum amount of unused node property widgets kept for reuse by the properties bin
+MAX_POOLED_PROP_WIDGETS = 32
+
 
 class NodePropWidget(node_property_widgets.NodePropWidget):
     """
@@ -42,6 +47,10 @@ class NodePropWidget(node_property_widgets.NodePropWidget):
         self.__node_id = node.id
         self.__tab_windows = {}
         self.__tab = QTabWidget()
+        # custom start - property widgets by property name, so they can be updated for another node
+        self._property_widgets = {}
+        self.layout_key = self.get_layout_key(node)
+        # custom end
 
         # custom start - disable close button
         # close_btn = QtWidgets.QPushButton()
@@ -160,22 +169,11 @@ class NodePropWidget(node_property_widgets.NodePropWidget):
                     widget._slider.origMousePressEvent = widget._slider.mousePressEvent
                     widget._slider.mousePressEvent = lambda e, w=widget: self.slider_drag_patch(w, e)
 
-                # try:
-                if type(value) == str and ", " in value:
-                    value = (v.strip() for v in value.split(","))
-
-                
-                if type(value) in [tuple, list] and type(widget.get_value()) in [tuple, list]:
-                    if len(value) < len(widget.get_value()):
-                        value = widget.get_value()
-                elif type(value) != type(widget.get_value()):
-                    value = widget.get_value()                    
-
-                prop_window.add_widget(prop_name, widget, value,
+                # custom start - remember the default value of the widget, values of the wrong type fall back to it
+                default_value = widget.get_value()
+                prop_window.add_widget(prop_name, widget, default_value,
                                        prop_name.replace('_', ' '))
-                # except:
-                #     logger.warning(f"failed to add propterty widget: {prop_name}", value)
-                #     continue
+                # custom end
 
                 widget.value_changed.connect(self._on_property_changed)
 
@@ -183,31 +181,10 @@ class NodePropWidget(node_property_widgets.NodePropWidget):
                 label = prop_window._PropertiesContainer__layout.itemAtPosition(
                     prop_window._PropertiesContainer__layout.rowCount() - 1, 0
                 ).widget()
-                if node.type_ in ["Other.QxGroupNode", "Inputs.QxPortInputNode", "Outputs.QxPortOutputNode"]:
-                    labelText = prop_name
-                else:
-                    labelText = node.get_mx_input_name_from_property_name(prop_name).replace("_", " ")
-                    mx_input = node.current_mx_def.getActiveInput(prop_name)
-                    hasGeomProp = mx_input and mx_input.getDefaultGeomProp()
-                    if hasGeomProp:
-                        widget.setDisabled(True)
-                        label.setDisabled(True)
-
-                label.setText(labelText.capitalize() + ": ")
-
-                # custom start - disable widget if the widget's corresponding input is wired up
-                if prop_name in node.inputs():
-                    if node.inputs()[prop_name].connected_ports():
-                        widget.setDisabled(True)
-                        label.setDisabled(True)
-                        # TODO: roll over to NodeGraphQt
-                        if hasattr(widget, "_spinbox"):
-                            widget._slider.setDisabled(True)
-                            widget._spinbox.setDisabled(True)
-                # custom end - disable widget
+                self._property_widgets[prop_name] = (widget, label, default_value)
+                # custom end - custom label
 
-        self.layout().itemAt(0).itemAt(0).widget().setText(getattr(node, "__label__", node.__identifier__))
-        # custom end - custom label
+        self.update_from_node(node)
 
         # custom start - disable node tab
         # self.add_tab('Node')
@@ -226,6 +203,89 @@ class NodePropWidget(node_property_widgets.NodePropWidget):
         # self.type_wgt.setText(model.get_property('type_'))
         # custom end
 
+    @staticmethod
+    def get_layout_key(node):
+        """Nodes with the same layout key can be displayed by the same widget, only their values differ.
+
+        Args:
+            node (NodeGraphQt.BaseNode): node to display.
+
+        Returns:
+            tuple: node type and the tab, name, widget type, items and range of each property.
+        """
+        model = node.model
+        common_props = node.graph.model.get_node_common_properties(node.type_) or {}
+        properties = []
+        for prop_name in model.custom_properties:
+            prop_attrs = common_props.get(prop_name, {})
+            properties.append(
+                (
+                    model.get_tab_name(prop_name),
+                    prop_name,
+                    node.get_widget_type(prop_name),
+                    tuple(prop_attrs.get("items") or ()),
+                    tuple(prop_attrs.get("range") or ()),
+                )
+            )
+
+        return node.type_, tuple(properties)
+
+    @property
+    def node_id(self):
+        return self.__node_id
+
+    def update_from_node(self, node):
+        """Display the values of a node with the same layout key as the node this widget has been created for.
+
+        Args:
+            node (NodeGraphQt.BaseNode): node to display.
+        """
+        self.__node_id = node.id
+        # Setting values would otherwise be reported as changes by the user
+        self.name_wgt.blockSignals(True)
+        self.name_wgt.set_value(node.name())
+        self.name_wgt.blockSignals(False)
+
+        custom_properties = node.model.custom_properties
+        for prop_name, (widget, label, default_value) in self._property_widgets.items():
+            value = custom_properties.get(prop_name)
+            if type(value) == str and ", " in value:
+                value = (v.strip() for v in value.split(","))
+
+            if type(value) in [tuple, list] and type(default_value) in [tuple, list]:
+                if len(value) < len(default_value):
+                    value = default_value
+            elif type(value) != type(default_value):
+                value = default_value
+
+            widget.blockSignals(True)
+            widget.set_value(value)
+            widget.blockSignals(False)
+
+            disabled = False
+            if node.type_ in ["Other.QxGroupNode", "Inputs.QxPortInputNode", "Outputs.QxPortOutputNode"]:
+                labelText = prop_name
+            else:
+                labelText = node.get_mx_input_name_from_property_name(prop_name).replace("_", " ")
+                mx_input = node.current_mx_def.getActiveInput(prop_name)
+                disabled = bool(mx_input and mx_input.getDefaultGeomProp())
+
+            label.setText(labelText.capitalize() + ": ")
+
+            # custom start - disable widget if the widget's corresponding input is wired up
+            if prop_name in node.inputs() and node.inputs()[prop_name].connected_ports():
+                disabled = True
+
+            widget.setDisabled(disabled)
+            label.setDisabled(disabled)
+            # TODO: roll over to NodeGraphQt
+            if hasattr(widget, "_spinbox"):
+                widget._slider.setDisabled(disabled)
+                widget._spinbox.setDisabled(disabled)
+            # custom end - disable widget
+
+        self.layout().itemAt(0).itemAt(0).widget().setText(getattr(node, "__label__", node.__identifier__))
+
     def update_widget_availability(self, node):
         # TODO when current node gets new input, refresh if if widgets should be disabled or not
         pass
@@ -261,10 +321,36 @@ class NodePropWidget(node_property_widgets.NodePropWidget):
         return self.__tab_windows[name]
 
 
+class NodePropWidgetCell(QWidget):
+    def __init__(self, prop_widget, parent=None):
+        """Cell of the properties bin holding a node property widget.
+        The table deletes the widgets of removed rows, the cell allows to take the property widget out beforehand.
+
+        Args:
+            prop_widget (NodePropWidget): property widget to display.
+            parent (QWidget, optional): parent widget.
+        """
+        super(NodePropWidgetCell, self).__init__(parent)
+        self.prop_widget = prop_widget
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(prop_widget)
+        prop_widget.show()
+
+    def take_prop_widget(self):
+        prop_widget = self.prop_widget
+        self.layout().removeWidget(prop_widget)
+        self.prop_widget = None
+        return prop_widget
+
+
 class PropertiesBinWidget(node_property_widgets.PropertiesBinWidget):
     def __init__(self, parent=None, root_node_graph=None):
         # custom start - call original init and then hide unnecessary widgets and connect custom signals
         super(PropertiesBinWidget, self).__init__(parent, root_node_graph)
+        # reuse property widgets of nodes with the same layout instead of creating new ones
+        # { layout_key: [NodePropWidget, ...] }
+        self._prop_widget_pool = OrderedDict()
         self.layout().itemAt(0).itemAt(0).widget().setHidden(True)
         self.layout().itemAt(0).itemAt(2).widget().setHidden(True)
         self.layout().itemAt(0).itemAt(3).widget().setHidden(True)
@@ -311,6 +397,7 @@ class PropertiesBinWidget(node_property_widgets.PropertiesBinWidget):
         self.add_selected_node()
     # custom end
 
+    @timed("PropertiesBinWidget.add_node")
     def add_node(self, node):
         """
         Add node to the properties bin.
@@ -323,27 +410,80 @@ class PropertiesBinWidget(node_property_widgets.PropertiesBinWidget):
 
         rows = self._prop_list.rowCount()
         if rows >= self.limit():
+            self._release_row(rows - 1)
             self._prop_list.removeRow(rows - 1)
 
         itm_find = self._prop_list.findItems(node.id, Qt.MatchExactly)
         if itm_find:
+            self._release_row(itm_find[0].row())
             self._prop_list.removeRow(itm_find[0].row())
 
         self._prop_list.insertRow(0)
-        # custom start - use custom qx_node_property.NodePropWidget
-        prop_widget = NodePropWidget(node=node)
+        # custom start - use custom qx_node_property.NodePropWidget, reused from the pool if possible
+        prop_widget = self._acquire_prop_widget(node)
+        self._prop_list.setCellWidget(0, 0, NodePropWidgetCell(prop_widget))
         # custom end
-        prop_widget.property_changed.connect(self.__on_property_widget_changed)
-        prop_widget.property_closed.connect(self.__on_prop_close)
-        self._prop_list.setCellWidget(0, 0, prop_widget)
 
         item = QTableWidgetItem(node.id)
         self._prop_list.setItem(0, 0, item)
         self._prop_list.selectRow(0)
 
+    # custom start - pool of node property widgets
+    def _acquire_prop_widget(self, node):
+        layout_key = NodePropWidget.get_layout_key(node)
+        pooled_prop_widgets = self._prop_widget_pool.get(layout_key)
+        if pooled_prop_widgets:
+            prop_widget = pooled_prop_widgets.pop()
+            if not pooled_prop_widgets:
+                del self._prop_widget_pool[layout_key]
+
+            prop_widget.update_from_node(node)
+            return prop_widget
+
+        prop_widget = NodePropWidget(node=node)
+        prop_widget.property_changed.connect(self.__on_property_widget_changed)
+        prop_widget.property_closed.connect(self.__on_prop_close)
+        return prop_widget
+
+    def _release_row(self, row):
+        """Move the property widget of a row to the pool before the row gets removed."""
+        cell = self._prop_list.cellWidget(row, 0)
+        if not isinstance(cell, NodePropWidgetCell) or not cell.prop_widget:
+            return
+
+        prop_widget = cell.take_prop_widget()
+        prop_widget.hide()
+        prop_widget.setParent(self)
+        self._prop_widget_pool.setdefault(prop_widget.layout_key, []).append(prop_widget)
+        self._prop_widget_pool.move_to_end(prop_widget.layout_key)
+
+        pooled_count = sum(len(prop_widgets) for prop_widgets in self._prop_widget_pool.values())
+        while pooled_count > MAX_POOLED_PROP_WIDGETS:
+            # Discard the widgets of the least recently displayed layout first
+            _, prop_widgets = self._prop_widget_pool.popitem(last=False)
+            for prop_widget in prop_widgets:
+                prop_widget.deleteLater()
+
+            pooled_count -= len(prop_widgets)
+
+    def clear_bin(self):
+        for row in range(self._prop_list.rowCount()):
+            self._release_row(row)
+
+        super(PropertiesBinWidget, self).clear_bin()
+
+    def prop_widget(self, node):
+        cell = super(PropertiesBinWidget, self).prop_widget(node)
+        if isinstance(cell, NodePropWidgetCell):
+            return cell.prop_widget
+
+        return cell
+    # custom end
+
     # custom start - show node properties when node gets created
     def _on_node_created(self, node):
-        if self.node_graph.get_root_graph()._block_save:
+        # transactions refresh the property bin once they are committed
+        if self.node_graph.get_root_graph()._block_save or self.node_graph.current_transaction:
             return
 
         self.add_node(node)
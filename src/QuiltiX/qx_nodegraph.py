@@ -1,22 +1,89 @@
+import copy
 import os
 import re
 import logging
-import copy
 from contextlib import contextmanager
 
 import NodeGraphQt
+from NodeGraphQt.base.commands import NodeAddedCmd, PortConnectedCmd
+from NodeGraphQt.nodes.base_node import BaseNode
 from NodeGraphQt.nodes.group_node import GroupNode
 from qtpy import QtCore, QtGui, QtWidgets  # type: ignore
 from QuiltiX.qx_nodegraph_viewer import QxNodeGraphViewer  
 
 import QuiltiX.qx_node as qx_node_module
-from QuiltiX import constants
+from QuiltiX import constants, mx_node
+from QuiltiX.qx_profiler import timed
 
 import MaterialX as mx  # type: ignore
 
 
 logger = logging.getLogger(__name__)
 
+# Classification of graph edits by their effect on the exported materials
+EDIT_TOPOLOGY_NEUTRAL = "topology_neutral"
+EDIT_VALUE_ONLY = "value_only"
+EDIT_TOPOLOGY_CHANGING = "topology_changing"
+
+# Sub graph session key holding the MaterialX content of a nodegraph which has not been expanded yet
+MX_NODE_GRAPH_SESSION_KEY = "mx_node_graph"
+
+
+class QxGraphTransaction(object):
+    def __init__(self):
+        """Records the changes made to a graph during a transaction.
+        The work usually triggered by these changes is deferred until the outermost transaction commits.
+        """
+        self.deleted_node_ids = set()
+        # {(node_id, property_name): (qx_node, property_value)}
+        self.properties = {}
+        self.property_bin_node = None
+        self.mx_data_update_requested = False
+        self.validation_requested = False
+
+    def add_property(self, qx_node, property_name, property_value):
+        self.properties[(qx_node.id, property_name)] = (qx_node, property_value)
+
+    def refresh_property_bin(self, qx_node):
+        self.property_bin_node = qx_node
+
+    def get_property_changes(self):
+        """
+        Returns:
+            list: (qx_node, property_name, property_value) of the last value of every changed property
+                  of nodes which have not been deleted during the transaction.
+        """
+        return [
+            (qx_node, property_name, property_value)
+            for (node_id, property_name), (qx_node, property_value) in self.properties.items()
+            if node_id not in self.deleted_node_ids
+        ]
+
+
+class QxNodesDeserializedCmd(QtWidgets.QUndoCommand):
+    def __init__(self, text="deserialized nodes"):
+        """Single undo entry for all nodes and connections created by a deserialization.
+        The nodes and connections are created before the command gets pushed, so its first redo does nothing.
+        """
+        super(QxNodesDeserializedCmd, self).__init__(text)
+        self.commands = []
+        self._is_done = True
+
+    def undo(self):
+        for command in reversed(self.commands):
+            command.undo()
+
+        self._is_done = False
+
+    def redo(self):
+        if self._is_done:
+            return
+
+        for command in self.commands:
+            command.redo()
+
+        self._is_done = True
+
 
 class QxNodeGraph(NodeGraphQt.NodeGraph):
     """
@@ -35,7 +102,9 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
     node_graph_changed = QtCore.Signal(object)
 
     def __init__(self, parent=None, node_factory=None, **kwargs):
-        kwargs["viewer"] = kwargs.get("viewer") or QxNodeGraphViewer(self)
+        # Sub graphs share the search widget of their parent graph
+        search_widget = parent.viewer().search_widget if isinstance(parent, QxNodeGraph) else None
+        kwargs["viewer"] = kwargs.get("viewer") or QxNodeGraphViewer(self, search_widget=search_widget)
         super(QxNodeGraph, self).__init__(parent, node_factory=node_factory, **kwargs)
         if self._undo_stack:
             self._viewer._undo_action = self._undo_stack.createUndoAction(self, '&Undo')
@@ -54,11 +123,31 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         self.potentially_node_graph_changed.connect(self.on_potentially_node_graph_changed)
         self.node_graph_changed.connect(self.on_node_graph_changed)
 
-        # Initialize mx containers
-        # The library document holds all the node definitions loaded and available for the nodegraph
-        self.mx_library_doc = mx.createDocument()
-        # The mx definitions available for the nodegraphself._realtime_update
-        self.mx_defs = None
+        # Revision of the graph content. Every mutating operation bumps the revision of the root graph,
+        # the export results (serialized session, mx doc, xml, validation) are memoized per revision.
+        self._transaction = None
+        self._transaction_depth = 0
+        self._revision = 0
+        self._export_cache = {}
+        self._export_cache_key = None
+        # MxGraphSignature of the graph the last time it was sent to the stage
+        self._synced_graph_signature = None
+        self.node_created.connect(self.bump_revision)
+        self.nodes_deleted.connect(self.bump_revision)
+        self.port_connected.connect(self.bump_revision)
+        self.port_disconnected.connect(self.bump_revision)
+        self.property_changed.connect(self._on_property_changed_bump_revision)
+        if self._undo_stack:
+            self._undo_stack.indexChanged.connect(self.bump_revision)
+
+        # Initialize mx containers, sub graphs use the ones of the root graph
+        if self.is_root:
+            # The library document holds all the node definitions loaded and available for the nodegraph
+            self.mx_library_doc = mx.createDocument()
+            # The mx definitions available for the nodegraphself._realtime_update
+            self.mx_defs = None
+            # The added, removed and changed mx definitions of the last library load
+            self.mx_defs_diff = None
         # Keeping track what node graph we are currently in
         self.current_node_graph = self
 
@@ -73,6 +162,88 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         yield
         self._block_save = False
 
+    @contextmanager
+    def transaction(self):
+        """Group graph edits. Validation, USD sync and property bin refresh run once when the
+        outermost transaction commits, instead of once per edit. Transactions can be nested.
+
+        Yields:
+            QxGraphTransaction: the changes recorded so far.
+        """
+        root_graph = self.get_root_graph()
+        if root_graph._transaction_depth == 0:
+            root_graph._transaction = QxGraphTransaction()
+
+        root_graph._transaction_depth += 1
+        try:
+            yield root_graph._transaction
+        finally:
+            root_graph._transaction_depth -= 1
+            if root_graph._transaction_depth == 0:
+                transaction = root_graph._transaction
+                root_graph._transaction = None
+                root_graph._commit_transaction(transaction)
+
+    @property
+    def current_transaction(self):
+        """
+        Returns:
+            QxGraphTransaction: the open transaction of the root graph, None if there is none.
+        """
+        return self.get_root_graph()._transaction
+
+    def _commit_transaction(self, transaction):
+        if self._block_save:
+            return
+
+        if transaction.mx_data_update_requested:
+            # validates and syncs the whole document, which includes all changed parameters
+            self.update_mx_xml_data_from_graph()
+        else:
+            property_changes = transaction.get_property_changes()
+            if transaction.validation_requested or property_changes:
+                self.refresh_validation()
+
+            for qx_node, property_name, property_value in property_changes:
+                self.mx_parameter_changed.emit(qx_node, property_name, property_value)
+
+        qx_node = transaction.property_bin_node
+        if qx_node and qx_node.id not in transaction.deleted_node_ids:
+            qx_node.graph.node_selected.emit(qx_node)
+
+    @property
+    def revision(self):
+        return self.get_root_graph()._revision
+
+    def bump_revision(self, *args):
+        root_graph = self.get_root_graph()
+        root_graph._revision += 1
+        root_graph._export_cache = {}
+
+    def _on_property_changed_bump_revision(self, qx_node, property_name, property_value):
+        # The selection is not part of the exported graph
+        if property_name == "selected":
+            return
+
+        self.bump_revision()
+
+    def _get_memoized_export(self, name, func):
+        """Return the result of func, computed at most once per graph revision.
+        Only the root graph memoizes, as it is the one being exported.
+        """
+        if not self.is_root:
+            return func()
+
+        cache_key = (self._revision, self.widget.parent().act_ng_abstraction.isChecked())
+        if cache_key != self._export_cache_key:
+            self._export_cache = {}
+            self._export_cache_key = cache_key
+
+        if name not in self._export_cache:
+            self._export_cache[name] = func()
+
+        return self._export_cache[name]
+
     # custom start - added function
     def get_root_graph(self, node_graph=None):
         if not node_graph:
@@ -122,31 +293,187 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
             mx.loadLibrary(library_path, doc)
             logger.debug(f"loaded definitions from {library_path}")
 
-        if self.mx_defs:
-            mx_defs = [mx_def for mx_def in doc.getNodeDefs() if mx_def not in self.mx_defs]
-        else:
-            mx_defs = doc.getNodeDefs()
+        current_mx_defs = mx_node.get_mx_node_def_map(doc.getNodeDefs())
+        self.mx_defs_diff = mx_node.diff_mx_node_defs(self.mx_defs or {}, current_mx_defs)
+        logger.debug(
+            f"node definitions: {len(self.mx_defs_diff.added)} added, {len(self.mx_defs_diff.removed)} removed, "
+            f"{len(self.mx_defs_diff.changed)} changed"
+        )
+        mx_defs = self.mx_defs_diff.added + self.mx_defs_diff.changed
 
         new_defs = []
         if mx_defs:
             new_defs = qx_node_module.qx_node_from_mx_node_group_dict_generator(mx_defs)
             self.register_nodes(new_defs)
+            self.add_copy_to_node_graph_commands(mx_defs)
 
-            node_menu = self.context_nodes_menu()
-            for mx_def in mx_defs:
-                if self.has_nodegraph_implementation(mx_def):
-                    
-                    node_type = f"{mx_def.getNodeGroup().capitalize()}.{mx_def.getNodeString().capitalize()}"
-                    if not node_menu.qmenu.get_menu(node_type):
-                        self.copy_to_ng_cmds[node_type] = node_menu.add_command(
-                            "Copy to Nodegraph",
-                            self.copy_to_node_graph,
-                            node_type=node_type,
-                        )
+        self.mx_defs = current_mx_defs
+        return new_defs
 
-        self.mx_defs = doc.getNodeDefs()
+    def load_embedded_mx_defs(self, doc):
+        """Register the node definitions of a document which are not part of the loaded libraries.
+        Only the elements of the document itself are scanned, the library document is left untouched.
+
+        Args:
+            doc (mx.Document): document which might define its own nodes.
+
+        Returns:
+            list: the registered node classes.
+        """
+        loaded_mx_defs = self.mx_defs or {}
+        embedded_mx_defs = [mx_def for mx_def in doc.getNodeDefs() if mx_def.getName() not in loaded_mx_defs]
+        self.mx_defs_diff = mx_node.MxNodeDefDiff(embedded_mx_defs, [], [])
+        if not embedded_mx_defs:
+            return []
+
+        logger.debug(f"embedded node definitions: {len(embedded_mx_defs)}")
+        new_defs = list(qx_node_module.qx_node_from_mx_node_group_dict_generator(embedded_mx_defs))
+        self.register_nodes(new_defs)
+        self.add_copy_to_node_graph_commands(embedded_mx_defs)
+        self.mx_defs = dict(loaded_mx_defs, **mx_node.get_mx_node_def_map(embedded_mx_defs))
         return new_defs
 
+    def reload_mx_library_files(self, file_paths):
+        """Reload the definitions of the given library files and re-register only the node types defined in them.
+        Nodes of these types in the open graphs are switched to the reloaded definitions.
+
+        Args:
+            file_paths (list): paths of added, modified or deleted library files.
+
+        Returns:
+            MxNodeDefDiff: added, removed and changed definitions.
+        """
+        file_paths = {os.path.normpath(file_path) for file_path in file_paths}
+        affected_node_types = set()
+        for element in self.mx_library_doc.getChildren():
+            source_uri = element.getActiveSourceUri()
+            if not source_uri or os.path.normpath(source_uri) not in file_paths:
+                continue
+
+            if isinstance(element, mx.NodeDef):
+                affected_node_types.add(self.get_node_type_from_mx_def(element))
+
+            self.mx_library_doc.removeChild(element.getName())
+
+        for file_path in sorted(file_paths):
+            if not os.path.isfile(file_path):
+                continue
+
+            library_doc = mx.createDocument()
+            try:
+                mx.readFromXmlFile(library_doc, file_path)
+            except Exception as e:
+                logger.warning(f"Failed to read definitions from {file_path}: {e}")
+                continue
+
+            # Material documents next to the libraries must not end up in the library document
+            if not library_doc.getNodeDefs():
+                logger.debug(f"skipped {file_path}, it does not define any nodes")
+                continue
+
+            self.mx_library_doc.importLibrary(library_doc)
+            logger.debug(f"reloaded definitions from {file_path}")
+
+        current_mx_defs = mx_node.get_mx_node_def_map(self.mx_library_doc.getNodeDefs())
+        diff = mx_node.diff_mx_node_defs(self.mx_defs or {}, current_mx_defs)
+        reloaded_mx_defs = [
+            mx_def
+            for mx_def in current_mx_defs.values()
+            if os.path.normpath(mx_def.getActiveSourceUri()) in file_paths
+        ]
+        changed_names = {mx_def.getName() for mx_def in diff.changed}
+        diff.changed.extend(
+            mx_def
+            for mx_def in reloaded_mx_defs
+            if mx_def.getName() in (self.mx_defs or {}) and mx_def.getName() not in changed_names
+        )
+        self.mx_defs_diff = diff
+        self.mx_defs = current_mx_defs
+        affected_node_types.update(self.get_node_type_from_mx_def(mx_def) for mx_def in reloaded_mx_defs)
+
+        # Node classes hold all definitions of a node, which might come from other files as well
+        affected_mx_defs = [
+            mx_def for mx_def in current_mx_defs.values() if self.get_node_type_from_mx_def(mx_def) in affected_node_types
+        ]
+        remaining_node_types = {self.get_node_type_from_mx_def(mx_def) for mx_def in affected_mx_defs}
+        for node_type in affected_node_types - remaining_node_types:
+            logger.warning(f"{node_type} has no definitions anymore, existing nodes keep their previous definition")
+
+        self.unregister_node_types(affected_node_types)
+        new_defs = list(qx_node_module.qx_node_from_mx_node_group_dict_generator(affected_mx_defs))
+        self.register_nodes(new_defs)
+        self.add_copy_to_node_graph_commands(affected_mx_defs)
+        self.update_nodes_from_node_classes(new_defs)
+
+        logger.debug(
+            f"reloaded node types {sorted(affected_node_types)}: {len(diff.added)} added, {len(diff.removed)} removed, "
+            f"{len(diff.changed)} changed definitions"
+        )
+        return diff
+
+    @staticmethod
+    def get_node_type_from_mx_def(mx_def):
+        return f"{(mx_def.getNodeGroup() or 'Other').capitalize()}.{mx_def.getNodeString().capitalize()}"
+
+    def unregister_node_types(self, node_types):
+        registered_nodes = self._node_factory.nodes
+        registered_names = self._node_factory.names
+        for node_type in node_types:
+            node_class = registered_nodes.pop(node_type, None)
+            if not node_class:
+                continue
+
+            name_node_types = registered_names.get(node_class.NODE_NAME, [])
+            if node_type in name_node_types:
+                name_node_types.remove(node_type)
+
+            if not name_node_types:
+                registered_names.pop(node_class.NODE_NAME, None)
+
+        self._viewer.rebuild_tab_search()
+
+    def update_nodes_from_node_classes(self, node_classes):
+        """Switch existing nodes to the definitions of their re-registered node classes.
+
+        Args:
+            node_classes (list): node classes which replace the registered classes of the same type.
+        """
+        node_classes = {node_class.type_: node_class for node_class in node_classes}
+        graphs = [self.get_root_graph()]
+        for graph in graphs:
+            graphs.extend(graph.sub_graphs.values())
+
+        with self.get_root_graph().transaction():
+            for graph in graphs:
+                for node in graph.all_nodes():
+                    node_class = node_classes.get(node.type_)
+                    if not node_class:
+                        continue
+
+                    current_mx_def_name = node.current_mx_def.getName()
+                    type_name = next(
+                        (
+                            type_name
+                            for type_name, mx_def in node_class.possible_mx_defs.items()
+                            if mx_def.getName() == current_mx_def_name
+                        ),
+                        next(iter(node_class.possible_mx_defs)),
+                    )
+                    node.set_mx_defs_from_node_class(node_class)
+                    node.change_type(type_name)
+
+    def add_copy_to_node_graph_commands(self, mx_defs):
+        node_menu = self.context_nodes_menu()
+        for mx_def in mx_defs:
+            if self.has_nodegraph_implementation(mx_def):
+                node_type = self.get_node_type_from_mx_def(mx_def)
+                if not node_menu.qmenu.get_menu(node_type):
+                    self.copy_to_ng_cmds[node_type] = node_menu.add_command(
+                        "Copy to Nodegraph",
+                        self.copy_to_node_graph,
+                        node_type=node_type,
+                    )
+
     def has_nodegraph_implementation(self, mx_def):
         imp = mx_def.getImplementation()
         if not imp:
@@ -208,6 +535,7 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         self._node_factory.clear_registered_nodes()
         self.mx_library_doc = mx.createDocument()
         self.mx_defs = None
+        self.mx_defs_diff = None
         self._viewer.rebuild_tab_search()
 
     def on_port_connected(self, input_port, output_port):
@@ -293,6 +621,9 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         if isinstance(qx_node, NodeGraphQt.BackdropNode):
             return
 
+        if self.current_transaction:
+            self.current_transaction.refresh_property_bin(qx_node)
+
         for nodeInput in qx_node.input_ports():
             if hasattr(nodeInput._Port__view, "refresh_tool_tip"):
                 nodeInput._Port__view.refresh_tool_tip()
@@ -344,6 +675,8 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
 
     def on_nodes_deleted(self, node_ids):
         self.has_deleted_nodes = True
+        if self.current_transaction:
+            self.current_transaction.deleted_node_ids.update(node_ids)
 
     def on_property_changed(self, qx_node, property_name, property_value):
         logger.debug(f"property changed {property_name} - {property_value}")
@@ -352,10 +685,13 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
             return
 
         if property_name == "type":
-            qx_node.change_type(property_value)
-            if qx_node.selected():
-                # this will update the property bin
-                self.node_selected.emit(qx_node)
+            # change_type syncs the changed node itself
+            with self.transaction() as transaction:
+                qx_node.change_type(property_value)
+                if qx_node.selected():
+                    # this will update the property bin
+                    transaction.refresh_property_bin(qx_node)
+            return
 
         if qx_node.type_ in ["Outputs.QxPortOutputNode"]:
             portnum = int(property_name.replace("Output #", ""))
@@ -402,7 +738,11 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
                 graph = self
             else:
                 graph = self.get_root_graph()
-            
+
+            if graph.current_transaction:
+                graph.current_transaction.add_property(qx_node, property_name, property_value)
+                return
+
             graph.refresh_validation()
             graph.mx_parameter_changed.emit(qx_node, property_name, property_value)
 
@@ -480,23 +820,28 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         for node_id in serialized_data.get("nodes", []):
             node_data = serialized_data["nodes"][node_id]
             mx_def = self.get_mx_node_def(node_data["type_"], node_data.get("custom", {}).get("type"))
+            if node_data["type_"] == "Other.QxGroupNode" and MX_NODE_GRAPH_SESSION_KEY in node_data["subgraph_session"]:
+                qx_node_ids_to_mx_nodes[node_id] = self.add_mx_node_graph_from_session(mx_parent, node_data)
+                continue
+
             if node_data["type_"] == "Other.QxGroupNode":
                 mx_node = mx_parent.addNodeGraph(node_data["name"])
                 self.get_mx_doc_from_serialized_data(node_data["subgraph_session"], mx_parent=mx_node, parent_id=node_id, parent_graph_data=serialized_data, qx_node_ids_to_mx_nodes=qx_node_ids_to_mx_nodes)
                 output_node = None
+                # the serialized data might be memoized, so the ids are not written into the node data
+                input_node_id = output_node_id = None
                 for subnode_id in node_data["subgraph_session"].get("nodes", []):
                     if node_data["subgraph_session"]["nodes"][subnode_id]["type_"] in ["Inputs.QxPortInputNode"]:
-                        input_node = node_data["subgraph_session"]["nodes"][subnode_id]
-                        input_node["id"] = subnode_id
+                        input_node_id = subnode_id
 
                     if node_data["subgraph_session"]["nodes"][subnode_id]["type_"] in ["Outputs.QxPortOutputNode"]:
                         output_node = node_data["subgraph_session"]["nodes"][subnode_id]
-                        output_node["id"] = subnode_id
+                        output_node_id = subnode_id
 
                 if output_node:
                     for port_data in output_node["input_ports"]:
                         for connection in node_data["subgraph_session"].get("connections", []):
-                            if connection["in"][0] == output_node["id"] and connection["in"][1] == port_data["name"]:
+                            if connection["in"][0] == output_node_id and connection["in"][1] == port_data["name"]:
                                 connected_data = connection["out"]
                                 connected_node_data = node_data["subgraph_session"]["nodes"][connected_data[0]]
                                 connected_mx_def = self.get_mx_node_def(connected_node_data["type_"], connected_node_data.get("custom", {}).get("type"))
@@ -553,7 +898,7 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
 
                 if node_data["type_"] == "Other.QxGroupNode":
                     for connection in node_data["subgraph_session"].get("connections", []):
-                        if connection["out"][0] == input_node["id"] and connection["out"][1] == input_data["name"]:
+                        if connection["out"][0] == input_node_id and connection["out"][1] == input_data["name"]:
                             connected_data = connection["in"]
                             connected_node_data = node_data["subgraph_session"]["nodes"][connected_data[0]]
                             connected_mx_def = self.get_mx_node_def(connected_node_data["type_"], connected_node_data.get("custom", {}).get("type"))
@@ -672,6 +1017,37 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
 
         return mx_parent
 
+    def add_mx_node_graph_from_session(self, mx_parent, node_data):
+        """Add a nodegraph which has not been expanded since it was loaded by copying its MaterialX content.
+
+        Args:
+            mx_parent (mx.Document): document to add the nodegraph to.
+            node_data (dict): serialized group node.
+
+        Returns:
+            mx.NodeGraph: the added nodegraph.
+        """
+        mx_graph_doc = mx.createDocument()
+        mx.readFromXmlString(mx_graph_doc, node_data["subgraph_session"][MX_NODE_GRAPH_SESSION_KEY])
+        mx_node_graph = mx_parent.addNodeGraph(node_data["name"])
+        mx_node_graph.copyContentFrom(mx_graph_doc.getNodeGraphs()[0])
+        # Nodegraphs of the graph are not bound to a definition
+        mx_node_graph.removeAttribute("nodedef")
+        mx_node_graph.setAttribute("xpos", str(node_data["pos"][0] * constants.NODEGRAPH_NODE_POSITION_SERIALIZATION_SCALE))
+        mx_node_graph.setAttribute("ypos", str(node_data["pos"][1] * constants.NODEGRAPH_NODE_POSITION_SERIALIZATION_SCALE))
+
+        # The connections and values of the group node properties might have been changed since loading.
+        # The stored connections are cleared here, the current ones are set by the connection loop.
+        custom_properties = node_data.get("custom", {})
+        for mx_input in mx_node_graph.getInputs():
+            for attribute in ("nodename", "nodegraph", "output"):
+                mx_input.removeAttribute(attribute)
+            val = custom_properties.get(mx_input.getName(), custom_properties.get(mx_input.getName() + "0"))
+            if val is not None:
+                self.set_mx_input_value(mx_input, val)
+
+        return mx_node_graph
+
     def set_mx_input_value(self, mx_input, val):
         # Convert vector like types
         mx_input_type = mx_input.getType()
@@ -693,6 +1069,18 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
                 mx_input.setValue(val, mx_input_type)
 
     def get_current_graph_data(self):
+        """
+        Returns:
+            dict: serialized data of the graph, including the sessions of expanded sub graphs.
+                A copy, callers are free to modify it.
+        """
+        return copy.deepcopy(self._get_memoized_graph_data())
+
+    def _get_memoized_graph_data(self):
+        # shared between all callers of the current revision, must not be modified
+        return self._get_memoized_export("graph_data", self._get_current_graph_data)
+
+    def _get_current_graph_data(self):
         serialized_data = self.serialize_session()
         for node_id in serialized_data.get("nodes", []):
             node_data = serialized_data["nodes"][node_id]
@@ -704,44 +1092,187 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         return serialized_data
 
     def get_current_mx_graph_doc(self):
-        serialized_data = self.get_current_graph_data()
+        """
+        Returns:
+            mx.Document: document exported from the graph. A copy, callers are free to modify it.
+        """
+        return self._get_memoized_mx_graph_doc().copy()
+
+    def _get_memoized_mx_graph_doc(self):
+        # shared between all callers of the current revision, must not be modified
+        return self._get_memoized_export("mx_doc", self._get_current_mx_graph_doc)
+
+    def _get_current_mx_graph_doc(self):
+        serialized_data = self._get_memoized_graph_data()
         doc = self.get_mx_doc_from_serialized_data(serialized_data)
         return doc
 
     def save_graph_as_mx_file(self, mx_file_path):
-        mx_graph_doc = self.get_current_mx_graph_doc()
+        mx_graph_doc = self._get_memoized_mx_graph_doc()
         mx.writeToXmlFile(mx_graph_doc, mx_file_path)
         logger.info(f"Wrote .mtlx file to {mx_file_path}")
 
     def get_mx_xml_data_from_graph(self):
-        mx_graph_doc = self.get_current_mx_graph_doc()
+        mx_graph_doc = self._get_memoized_mx_graph_doc()
         self.get_root_graph().widget.parent().validate(mx_graph_doc, popup=False)
-        xml_data = mx.writeToXmlString(mx_graph_doc)
+        xml_data = self._get_memoized_export("xml_data", lambda: mx.writeToXmlString(mx_graph_doc))
         return xml_data
     
+    @timed("refresh_validation")
     def refresh_validation(self):
-        mx_graph_doc = self.get_current_mx_graph_doc()
+        if self.current_transaction:
+            self.current_transaction.validation_requested = True
+            return
+
+        mx_graph_doc = self._get_memoized_mx_graph_doc()
         self.get_root_graph().widget.parent().validate(mx_graph_doc, popup=False)
 
-    def update_mx_xml_data_from_graph(self):
+    @timed("update_mx_xml_data_from_graph")
+    def update_mx_xml_data_from_graph(self, force=False):
+        """Send the graph to the stage. Edits which don't change the exported partitions are skipped and
+        value-only edits are sent as parameter updates.
+
+        Args:
+            force (bool): always rebuild the layers of the stage, fe. when the stage has been replaced.
+        """
         if self.get_root_graph()._block_save:
             return
         
         if not self.is_root:
-            return self.get_root_graph().update_mx_xml_data_from_graph()
+            return self.get_root_graph().update_mx_xml_data_from_graph(force=force)
+
+        if self.current_transaction:
+            self.current_transaction.mx_data_update_requested = True
+            return
+
+        edit_type = EDIT_TOPOLOGY_CHANGING if force else self.classify_graph_edit()
+        if edit_type == EDIT_TOPOLOGY_NEUTRAL:
+            # eg. reconnecting the same ports or moving nodes
+            logger.debug("skipped mx xml data update, the exported partitions did not change")
+            self.refresh_validation()
+            return
+
+        if edit_type == EDIT_VALUE_ONLY and self.update_changed_mx_values():
+            return
 
         xml_data = self.get_mx_xml_data_from_graph()
         if not xml_data:
             return
 
+        self._synced_graph_signature = self.get_mx_graph_signature()
         # print(f"updated mx xml data: {xml_data}")
-        logger.debug("updated mx xml data")
+        logger.debug(f"updated mx xml data ({edit_type})")
         self.mx_data_updated.emit(xml_data, True)
 
+    def update_changed_mx_values(self):
+        """Send the values changed since the graph was last sent to the stage as parameter updates,
+        instead of rebuilding its layers.
+
+        Returns:
+            bool: False if a changed value could not be traced back to a node property or could not be applied
+                  to the stage, the layers need to be rebuilt then.
+        """
+        signature = self.get_mx_graph_signature()
+        changed_properties = []
+        for name_path in mx_node.get_changed_mx_input_paths(self._synced_graph_signature.values, signature.values):
+            qx_property = self.get_qx_property_from_mx_input_path(name_path)
+            if not qx_property:
+                logger.debug(f"could not find the property of changed input {name_path}")
+                return False
+
+            changed_properties.append(qx_property)
+
+        self.refresh_validation()
+        # Receivers which fail to apply a value reset the synced signature
+        self._synced_graph_signature = signature
+        for qx_node, property_name in changed_properties:
+            self.mx_parameter_changed.emit(qx_node, property_name, qx_node.get_property(property_name))
+            if self._synced_graph_signature is None:
+                logger.debug(f"could not apply the changed value of {qx_node.name()}.{property_name}")
+                return False
+
+        logger.debug(f"updated {len(changed_properties)} changed values")
+        return True
+
+    def reset_synced_graph_signature(self):
+        """Forget which graph has been sent to the stage, so the next update rebuilds its layers."""
+        self.get_root_graph()._synced_graph_signature = None
+
+    def get_qx_property_from_mx_input_path(self, name_path):
+        """Find the node property an input of the exported document has been written from.
+
+        Args:
+            name_path (str): name path of the input in the exported document, fe. "NG_main/image1/file".
+
+        Returns:
+            tuple(NodeObject, str): node and property name, None if the input can't be traced back to a property.
+        """
+        *element_names, input_name = name_path.split("/")
+        graph = self.get_root_graph()
+        qx_node = None
+        for index, element_name in enumerate(element_names):
+            if qx_node is not None:
+                # Nodes of nodegraphs which have not been expanded are only stored in the group node's session
+                sub_graph = qx_node.get_sub_graph() if isinstance(qx_node, GroupNode) else None
+                if not sub_graph:
+                    return
+
+                graph = sub_graph
+
+            qx_node = graph.get_node_by_name(element_name)
+            if qx_node is None:
+                if index == 0 and element_name == "NG_main":
+                    # nodegraph abstraction of the nodes of the root graph
+                    continue
+
+                return
+
+        if qx_node is None:
+            return
+
+        custom_properties = qx_node.model.custom_properties
+        for property_name in (input_name, input_name + "0"):
+            if property_name in custom_properties:
+                return qx_node, property_name
+
+    def get_mx_graph_signature(self):
+        """
+        Returns:
+            MxGraphSignature: topology hash and input values of the current graph, see mx_node.get_mx_graph_signature.
+        """
+        return self._get_memoized_export(
+            "graph_signature", lambda: mx_node.get_mx_graph_signature(self._get_memoized_mx_graph_doc())
+        )
+
+    def classify_graph_edit(self):
+        """Classify the changes of the graph since it was last sent to the stage.
+
+        Returns:
+            str: EDIT_TOPOLOGY_NEUTRAL, EDIT_VALUE_ONLY or EDIT_TOPOLOGY_CHANGING.
+        """
+        if self._synced_graph_signature is None:
+            return EDIT_TOPOLOGY_CHANGING
+
+        signature = self.get_mx_graph_signature()
+        if signature.topology_hash != self._synced_graph_signature.topology_hash:
+            return EDIT_TOPOLOGY_CHANGING
+
+        if signature.values != self._synced_graph_signature.values:
+            return EDIT_VALUE_ONLY
+
+        return EDIT_TOPOLOGY_NEUTRAL
+
     def validate_mtlx_doc(self, doc=None):
-        doc = doc or self.get_current_mx_graph_doc()
+        current_doc = self._get_memoized_mx_graph_doc()
+        # identity, the equality operator of MaterialX compares the whole documents
+        if doc is None or doc is current_doc:
+            return self._get_memoized_export("validation", lambda: self._validate_mtlx_doc(current_doc))
+
+        return self._validate_mtlx_doc(doc)
+
+    def _validate_mtlx_doc(self, doc):
         doc = doc.copy()
-        doc.importLibrary(self.mx_library_doc)
+        mx_node.set_mx_data_library(doc, self.mx_library_doc)
         result = doc.validate()
         return result
 
@@ -768,13 +1299,13 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         # _searchPath = _libraryDir
 
         # mx.readFromXmlFile(doc, path, _searchPath)
-        new_defs = self.load_mx_libraries(library_path=mx_file_path, add_to_lib_doc=False)
+        mx.readFromXmlFile(doc, mx_file_path)
+        new_defs = self.load_embedded_mx_defs(doc)
         if new_defs:
             dirpath = os.path.dirname(mx_file_path)
             if dirpath not in os.getenv("PXR_MTLX_PLUGIN_SEARCH_PATHS", "").split(os.pathsep):
                 os.environ["PXR_MTLX_PLUGIN_SEARCH_PATHS"] = os.getenv("PXR_MTLX_PLUGIN_SEARCH_PATHS", "") + os.pathsep + dirpath
 
-        mx.readFromXmlFile(doc, mx_file_path)
         self.load_graph_from_mx_doc(doc)
         self.mx_file_loaded.emit(mx_file_path)
 
@@ -790,6 +1321,8 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         self.mx_file_loaded.emit("")
 
     def load_graph_from_mx_doc(self, doc):
+        self.bump_revision()
+        self.reset_synced_graph_signature()
         with self.get_root_graph().block_save():
             self.clear_session()
 
@@ -798,7 +1331,7 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
 
             mx_nodes = doc.getNodes()
             mx_graphs = doc.getNodeGraphs()
-            doc.importLibrary(self.mx_library_doc)
+            mx_node.set_mx_data_library(doc, self.mx_library_doc)
 
             # Create Nodes
             for cur_mx_node in mx_nodes:
@@ -809,16 +1342,13 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
 
                 qx_node_to_mx_node[cur_qx_node] = cur_mx_node
 
+            # The content of nodegraphs is only built once they get expanded
             for mx_graph in mx_graphs:
-                ng_node = self.create_nodegraph_from_mx_nodegraph(mx_graph)
+                self.create_nodegraph_from_mx_nodegraph(mx_graph, lazy=True)
                 for cur_mx_node in mx_graph.getNodes():
                     if cur_mx_node.hasAttribute("xpos") and cur_mx_node.hasAttribute("ypos"):
                         had_pos = True
 
-                    cur_qx_node = self.create_node_from_mx_node(cur_mx_node, graph=ng_node.get_sub_graph())
-                    # Change value type of node
-                    qx_node_to_mx_node[cur_qx_node] = cur_mx_node
-
             for cur_qx_node, cur_mx_node in qx_node_to_mx_node.items():
                 cur_qx_node.graph.connect_qx_inputs_from_mx_node(cur_qx_node, cur_mx_node)
 
@@ -859,8 +1389,13 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
                 qx_input_port.connect_to(qx_output_port)
 
             mx_connected_node = mx_input.getConnectedNode()
+            is_node_graph_output = mx_connected_port and mx_connected_port.getParent().CATEGORY == "nodegraph"
+            if is_node_graph_output and not qx_input_node.is_expanded:
+                # The content of the nodegraph gets connected once it is expanded
+                mx_connected_node = None
+
             if mx_connected_node:
-                if mx_connected_port and mx_connected_port.getParent().CATEGORY == "nodegraph":
+                if is_node_graph_output:
                     port_node = qx_input_node.get_sub_graph().get_output_port_nodes()[0]
                     qx_input_port = port_node.get_input(mx_connected_port.getName())
                     mx_input_node_name = mx_connected_node.getName()
@@ -897,18 +1432,21 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
                 continue
 
             mx_connected_node = mx_ng_output.getConnectedNode()
+            if not mx_connected_node:
+                continue
+
             mx_input_node_name = mx_connected_node.getName()
             qx_input_node = ng_node.get_sub_graph().get_node_by_name(mx_input_node_name)
             qx_output_port = qx_input_node.get_output("out")
             in_port.connect_to(qx_output_port)
 
         in_port_node = ng_node.get_sub_graph().get_input_port_nodes()[0]
-        for mx_node in mx_ng.getNodes():
-            for mx_input in mx_node.getActiveInputs():
+        for mx_inner_node in mx_ng.getNodes():
+            for mx_input in mx_inner_node.getActiveInputs():
                 if mx_input.hasInterfaceName():
                     intf_name = mx_input.getInterfaceName()
                     out_port = in_port_node.get_output(intf_name)
-                    qx_output_node = ng_node.get_sub_graph().get_node_by_name(mx_node.getName())
+                    qx_output_node = ng_node.get_sub_graph().get_node_by_name(mx_inner_node.getName())
                     qx_input_port = qx_output_node.get_input(mx_input.getName())
                     out_port.connect_to(qx_input_port)
 
@@ -953,7 +1491,8 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         text_color=None,
         pos=None,
         push_undo=True,
-        create_ports=True
+        create_ports=True,
+        lazy=False
     ):
         name = name or mx_node.getName()
         if not pos and mx_node.hasAttribute("xpos") and mx_node.hasAttribute("ypos"):
@@ -982,10 +1521,73 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
                 color = qx_node_module.QxNodeBase._random_color_from_string(str(minput.getType()))
                 in_port = qx_node.add_input(minput.getName(), color=color)
                 in_port.view.setToolTip(minput.getType())
-            
-        self.expand_group_node(qx_node)
+
+        if lazy:
+            qx_node.set_sub_graph_session(self.get_sub_graph_session_from_mx_nodegraph(mx_node))
+        else:
+            self.expand_group_node(qx_node)
+
         return qx_node
 
+    def get_sub_graph_session_from_mx_nodegraph(self, mx_node_graph):
+        """Store the MaterialX content of a nodegraph as sub graph session,
+        so the sub graph only gets built once its group node is expanded.
+
+        Args:
+            mx_node_graph (mx.NodeGraph): nodegraph to store.
+
+        Returns:
+            dict: sub graph session.
+        """
+        mx_graph_doc = mx.createDocument()
+        for cur_mx_node in mx_node_graph.getNodes():
+            mx_def = cur_mx_node.getNodeDef()
+            # Definitions embedded in the loaded file are not part of the library document
+            if (
+                mx_def
+                and not self.mx_library_doc.getNodeDef(mx_def.getName())
+                and not mx_graph_doc.getNodeDef(mx_def.getName())
+            ):
+                mx_graph_doc.addNodeDef(mx_def.getName()).copyContentFrom(mx_def)
+
+        mx_graph_doc.addNodeGraph(mx_node_graph.getName()).copyContentFrom(mx_node_graph)
+        return {MX_NODE_GRAPH_SESSION_KEY: mx.writeToXmlString(mx_graph_doc)}
+
+    def build_sub_graph_from_session(self, sub_graph, session):
+        """Create the nodes of a nodegraph which has been stored with get_sub_graph_session_from_mx_nodegraph.
+
+        Args:
+            sub_graph (QxSubNodeGraph): expanded sub graph of the group node.
+            session (dict): sub graph session of the group node.
+        """
+        mx_node_graph_data = session.get(MX_NODE_GRAPH_SESSION_KEY)
+        if not mx_node_graph_data:
+            return
+
+        mx_graph_doc = mx.createDocument()
+        mx.readFromXmlString(mx_graph_doc, mx_node_graph_data)
+        mx_node.set_mx_data_library(mx_graph_doc, self.mx_library_doc)
+        mx_node_graph = mx_graph_doc.getNodeGraphs()[0]
+        with self.get_root_graph().block_save():
+            had_pos = False
+            qx_node_to_mx_node = {}
+            for cur_mx_node in mx_node_graph.getNodes():
+                if cur_mx_node.hasAttribute("xpos") and cur_mx_node.hasAttribute("ypos"):
+                    had_pos = True
+
+                cur_qx_node = self.create_node_from_mx_node(cur_mx_node, graph=sub_graph, push_undo=False)
+                qx_node_to_mx_node[cur_qx_node] = cur_mx_node
+
+            for cur_qx_node, cur_mx_node in qx_node_to_mx_node.items():
+                sub_graph.connect_qx_inputs_from_mx_node(cur_qx_node, cur_mx_node)
+
+            self.connect_qx_ng_ports_from_mx_ng(sub_graph.node, mx_node_graph, None)
+            if not had_pos:
+                sub_graph.auto_layout_nodes()
+
+        # Building the content is not an edit of the user
+        sub_graph.clear_undo_stack()
+
     def get_qx_node_type_from_mx_node(self, mx_node):
         mx_node_type = mx_node.getType()
         # There are some nodes duplicate in multiple categories with different behaviour
@@ -1034,6 +1636,8 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         with self.get_root_graph().block_save():
             super(QxNodeGraph, self).delete_nodes(nodes, push_undo)
 
+        self.bump_revision()
+
         if self.has_deleted_nodes and self.get_root_graph().auto_update_ng:
             self.update_mx_xml_data_from_graph()
 
@@ -1092,7 +1696,10 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
             return sub_graph
 
         # build new sub graph.
-        node_factory = copy.deepcopy(self.node_factory)
+        # custom start - share the node factory, so (re-)registered nodes are available in all graphs
+        # node_factory = copy.deepcopy(self.node_factory)
+        node_factory = self.node_factory
+        # custom end
         layout_direction = self.layout_direction()
         # custom start  - replace Subgraph with own and emit node graph changed signal
         # sub_graph = SubGraph(self,
@@ -1112,6 +1719,10 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
         # store reference to expanded.
         self._sub_graphs[node.id] = sub_graph
 
+        # custom start - build the content of nodegraphs which have not been expanded since loading
+        self.build_sub_graph_from_session(sub_graph, session)
+        # custom end
+
         # open new tab at root level.
         self.widget.add_viewer(sub_graph.widget, node.name(), node.id)
 
@@ -1143,6 +1754,140 @@ class QxNodeGraph(NodeGraphQt.NodeGraph):
             if node:
                 return node
 
+    def _deserialize(self, data, relative_pos=False, pos=None):
+        """
+        deserialize node data.
+        (used internally by the node graph)
+
+        Args:
+            data (dict): node data.
+            relative_pos (bool): position node relative to the cursor.
+            pos (tuple or list): custom x, y position.
+
+        Returns:
+            list[NodeGraphQt.Nodes]: list of node instances.
+        """
+        # custom start - create nodes with their final type and record everything as a single undo command,
+        # without signals or undo commands per node and connection
+        # update node graph properties.
+        for attr_name, attr_value in data.get('graph', {}).items():
+            if attr_name == 'acyclic':
+                self.set_acyclic(attr_value)
+            elif attr_name == 'pipe_collision':
+                self.set_pipe_collision(attr_value)
+            elif attr_name == 'pipe_slicing':
+                self.set_pipe_slicing(attr_value)
+
+        port_nodes = self._get_deserialize_port_nodes()
+        command = QxNodesDeserializedCmd()
+
+        # build the nodes.
+        nodes = {}
+        for n_id, n_data in data.get('nodes', {}).items():
+            identifier = n_data['type_']
+            port_node = port_nodes.get(identifier, {}).get(n_data.get('name'))
+            if port_node:
+                nodes[n_id] = port_node
+                port_node.set_pos(*(n_data.get('pos') or [0, 0]))
+                continue
+
+            node = self._create_deserialized_node_instance(identifier, n_data)
+            if not node:
+                continue
+
+            node.NODE_NAME = n_data.get('name') or node.NODE_NAME
+            # set properties.
+            for prop in node.model.properties.keys():
+                if prop in n_data.keys():
+                    node.model.set_property(prop, n_data[prop])
+            # set custom properties.
+            for prop, val in n_data.get('custom', {}).items():
+                node.model.set_property(prop, val)
+                if isinstance(node, BaseNode) and prop in node.view.widgets:
+                    node.view.widgets[prop].set_value(val)
+
+            nodes[n_id] = node
+            self.add_node(node, n_data.get('pos'), selected=False, push_undo=False)
+            command.commands.append(NodeAddedCmd(self, node, n_data.get('pos')))
+
+            if n_data.get('port_deletion_allowed', None) and not self._has_deserialized_ports(node, n_data):
+                node.set_ports({
+                    'input_ports': n_data['input_ports'],
+                    'output_ports': n_data['output_ports']
+                })
+
+        # build the connections.
+        for connection in data.get('connections', []):
+            nid, pname = connection.get('in', ('', ''))
+            in_node = nodes.get(nid) or self._model.nodes.get(nid)
+            if not in_node:
+                continue
+            in_port = in_node.inputs().get(pname)
+
+            nid, pname = connection.get('out', ('', ''))
+            out_node = nodes.get(nid) or self._model.nodes.get(nid)
+            if not out_node:
+                continue
+            out_port = out_node.outputs().get(pname)
+
+            if in_port and out_port:
+                # only connect if input port is not connected yet or input port
+                # can have multiple connections.
+                # important when duplicating nodes.
+                allow_connection = any([not in_port.model.connected_ports,
+                                        in_port.model.multi_connection])
+                if allow_connection:
+                    connection_command = PortConnectedCmd(in_port, out_port)
+                    connection_command.redo()
+                    command.commands.append(connection_command)
+
+        if command.commands:
+            self._undo_stack.push(command)
+        # custom end
+
+        node_objs = list(nodes.values())
+        if relative_pos:
+            self._viewer.move_nodes([n.view for n in node_objs])
+            [setattr(n.model, 'pos', n.view.xy_pos) for n in node_objs]
+        elif pos:
+            self._viewer.move_nodes([n.view for n in node_objs], pos=pos)
+            [setattr(n.model, 'pos', n.view.xy_pos) for n in node_objs]
+
+        return node_objs
+
+    def _get_deserialize_port_nodes(self):
+        """
+        Returns:
+            dict: existing nodes used for deserialized nodes of a type {<node type>: {<node name>: node}}
+        """
+        return {}
+
+    def _create_deserialized_node_instance(self, node_type, node_data):
+        node_type = self._node_factory.aliases.get(node_type, node_type)
+        node_class = self._node_factory.nodes.get(node_type)
+        if not node_class:
+            return None
+
+        # Creating the node with its type avoids rebuilding its ports when the type gets changed afterwards
+        type_name = node_data.get('custom', {}).get('type')
+        if (
+            type_name
+            and issubclass(node_class, qx_node_module.QxNode)
+            and type_name in node_class.possible_mx_defs
+        ):
+            return node_class(node_type=type_name)
+
+        return node_class()
+
+    @staticmethod
+    def _has_deserialized_ports(node, node_data):
+        input_names = [port_data['name'] for port_data in node_data.get('input_ports', [])]
+        output_names = [port_data['name'] for port_data in node_data.get('output_ports', [])]
+        return (
+            [port.name() for port in node.input_ports()] == input_names
+            and [port.name() for port in node.output_ports()] == output_names
+        )
+
     def _on_connection_sliced(self, ports):
         with self.get_root_graph().block_save():
             super(QxNodeGraph, self)._on_connection_sliced(ports)
@@ -6,6 +6,8 @@ class QxTabSearchWidget(
 ):
     def __init__(self, node_dict=None):
         self.port_to_connect = None
+        # The viewer which opened the search widget last
+        self.viewer = None
         super(QxTabSearchWidget, self).__init__()
 
         # override TabSearchMenuWidget stylesheet
@@ -12,16 +12,40 @@ import os
 
 
 class QxNodeGraphViewer(NodeGraphQt.widgets.viewer.NodeViewer):
-    def __init__(self, node_graph, parent=None, undo_stack=None):
+    # emitted every time the viewer gets shown
+    shown = QtCore.Signal()
+
+    def __init__(self, node_graph, parent=None, undo_stack=None, search_widget=None):
         super(QxNodeGraphViewer, self).__init__(parent, undo_stack)
 
-        self._search_widget = QxTabSearchWidget()
+        # The viewers of sub graphs share the search widget of the root graph,
+        # so its menu tree only needs to be built once
+        self._search_widget = search_widget or QxTabSearchWidget()
         self._search_widget.search_submitted.connect(self._on_search_submitted)
         self.data_dropped.connect(self.on_data_dropped)
 
         # Added self.graph so it is always available for function calls
         self.graph = node_graph
 
+    @property
+    def search_widget(self):
+        return self._search_widget
+
+    def showEvent(self, event):
+        super(QxNodeGraphViewer, self).showEvent(event)
+        self.shown.emit()
+
+    def tab_search_set_nodes(self, nodes):
+        self._search_widget.viewer = self
+        super(QxNodeGraphViewer, self).tab_search_set_nodes(nodes)
+
+    def _on_search_submitted(self, node_type):
+        # Only the viewer which opened the shared search widget creates the node
+        if getattr(self._search_widget, "viewer", self) is not self:
+            return
+
+        super(QxNodeGraphViewer, self)._on_search_submitted(node_type)
+
     def on_data_dropped(self, data, pos):
         img_count = 0
         for url in data.urls():
@@ -364,32 +388,13 @@ class QxNodeGraphViewer(NodeGraphQt.widgets.viewer.NodeViewer):
                 continue
 
             if port.port_type == "in":
-                output_types = []
-                for mxdef in nodeDef.possible_mx_defs.values():
-                    outputs = mxdef.getActiveOutputs()
-                    if not outputs:
-                        continue
-
-                    output_types += [output.getType() for output in outputs]
-
+                output_types = getattr(nodeDef, "mx_output_types", None) or ()
                 input_types = port.get_port_types()
             else:
-                input_types = []
-                for mxdef in nodeDef.possible_mx_defs.values():
-                    mx_inputs = mxdef.getActiveInputs()
-                    if not mx_inputs:
-                        continue
-
-                    input_types += [mx_input.getType() for mx_input in mx_inputs]
-
+                input_types = getattr(nodeDef, "mx_input_types", None) or ()
                 output_types = port.get_port_types()
 
-            compatible = False
-            for input_type in input_types:
-                if input_type in output_types:
-                    compatible = True
-
-            if compatible:
+            if any(input_type in output_types for input_type in input_types):
                 filtered_nodes[node] = nodes[node]
 
         return filtered_nodes
@@ -56,19 +56,8 @@ class QxPortItem(NodeGraphQt.qgraphics.node_base.PortItem):
 
             port_types = [mxport.getType()]
         else:
-            port_types = []
-            for mxdef in self.node.basenode.possible_mx_defs.values():
-                if self.port_type == "in":
-                    mxport = mxdef.getActiveInput(self.name)
-                else:
-                    mxport = mxdef.getActiveOutput(self.name)
-
-                if not mxport:
-                    continue
-
-                port_type = mxport.getType()
-                if port_type not in port_types:
-                    port_types.append(port_type)
+            mx_port_types = getattr(self.node.basenode, "mx_port_types", None) or {}
+            port_types = list(mx_port_types.get((self.port_type, self.name), ()))
 
         return port_types
 
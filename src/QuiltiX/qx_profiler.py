@@ -0,0 +1,232 @@
+import functools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from qtpy import QtCore  # type: ignore
+from qtpy.QtWidgets import (  # type: ignore
+    QCheckBox,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+logger = logging.getLogger(__name__)
+
+# Set to "1" to start QuiltiX with the profiler enabled
+PROFILER_ENV_VAR = "QUILTIX_PROFILE"
+
+# Amount of samples per stage used for the rolling percentiles
+ROLLING_SAMPLE_COUNT = 200
+
+# Maximum amount of events kept for the chrome trace export
+MAX_TRACE_EVENTS = 100000
+
+
+class Profiler(object):
+    def __init__(self, enabled=False):
+        """Collects named timings of the editors hot paths.
+
+        The samples of each stage are kept in a rolling window to compute percentiles.
+        Additionally every timing is recorded as a complete event, which can be exported
+        in the chrome trace event format (chrome://tracing, perfetto).
+        """
+        self.enabled = enabled
+        self._samples = {}
+        self._counts = {}
+        self._trace_events = deque(maxlen=MAX_TRACE_EVENTS)
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        logger.debug(f"profiler enabled: {enabled}")
+
+    def reset(self):
+        self._samples = {}
+        self._counts = {}
+        self._trace_events.clear()
+
+    def add_sample(self, name, start, end):
+        """Record a timing.
+
+        Args:
+            name (str): name of the stage.
+            start (float): start time as returned by time.perf_counter().
+            end (float): end time as returned by time.perf_counter().
+        """
+        if name not in self._samples:
+            self._samples[name] = deque(maxlen=ROLLING_SAMPLE_COUNT)
+            self._counts[name] = 0
+
+        self._samples[name].append(end - start)
+        self._counts[name] += 1
+        self._trace_events.append(
+            {
+                "name": name,
+                "cat": "QuiltiX",
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+            }
+        )
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_sample(name, start, time.perf_counter())
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: {<stage name>: {"count": int, "last": float, "p50": float, "p95": float}} in milliseconds.
+        """
+        stats = {}
+        for name, samples in self._samples.items():
+            if not samples:
+                continue
+
+            sorted_samples = sorted(samples)
+            stats[name] = {
+                "count": self._counts[name],
+                "last": samples[-1] * 1000,
+                "p50": _percentile(sorted_samples, 50) * 1000,
+                "p95": _percentile(sorted_samples, 95) * 1000,
+            }
+
+        return stats
+
+    def get_chrome_trace(self):
+        return {"traceEvents": list(self._trace_events), "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.get_chrome_trace(), f)
+
+        logger.info(f"Wrote chrome trace to {path}")
+
+
+def _percentile(sorted_samples, percent):
+    # nearest-rank percentile
+    rank = math.ceil(percent / 100.0 * len(sorted_samples))
+    return sorted_samples[min(max(rank, 1), len(sorted_samples)) - 1]
+
+
+profiler = Profiler(enabled=os.getenv(PROFILER_ENV_VAR, "0") == "1")
+
+
+def timed(name):
+    """Decorator timing every call of the decorated function as stage `name`.
+    When the profiler is disabled this only costs an attribute lookup.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.add_sample(name, start, time.perf_counter())
+
+        return wrapper
+
+    return decorator
+
+
+class ProfilerWidget(QWidget):
+    STAT_COLUMNS = ["Stage", "Calls", "Last (ms)", "p50 (ms)", "p95 (ms)"]
+
+    def __init__(self, parent=None):
+        super(ProfilerWidget, self).__init__(parent)
+        self.cb_enabled = QCheckBox("Enabled")
+        self.cb_enabled.setChecked(profiler.enabled)
+        self.cb_enabled.toggled.connect(profiler.set_enabled)
+        self.b_reset = QPushButton("Reset")
+        self.b_reset.clicked.connect(self.reset)
+        self.b_export = QPushButton("Export Chrome Trace...")
+        self.b_export.clicked.connect(self.export_triggered)
+
+        self.tw_stats = QTableWidget(0, len(self.STAT_COLUMNS))
+        self.tw_stats.setHorizontalHeaderLabels(self.STAT_COLUMNS)
+        self.tw_stats.verticalHeader().setVisible(False)
+        self.tw_stats.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tw_stats.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tw_stats.setSortingEnabled(True)
+
+        lo_buttons = QHBoxLayout()
+        lo_buttons.addWidget(self.cb_enabled)
+        lo_buttons.addStretch()
+        lo_buttons.addWidget(self.b_reset)
+        lo_buttons.addWidget(self.b_export)
+        lo_main = QVBoxLayout(self)
+        lo_main.setContentsMargins(0, 0, 0, 0)
+        lo_main.addLayout(lo_buttons)
+        lo_main.addWidget(self.tw_stats)
+
+        # Only poll the profiler while the panel is visible
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(500)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
+
+    def sizeHint(self):
+        return QtCore.QSize(400, 250)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super(ProfilerWidget, self).showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super(ProfilerWidget, self).hideEvent(event)
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+    def refresh(self):
+        stats = profiler.get_stats()
+        self.tw_stats.setSortingEnabled(False)
+        self.tw_stats.setRowCount(len(stats))
+        for row, name in enumerate(sorted(stats)):
+            stage_stats = stats[name]
+            values = [stage_stats["count"], stage_stats["last"], stage_stats["p50"], stage_stats["p95"]]
+            self.tw_stats.setItem(row, 0, QTableWidgetItem(name))
+            for column, value in enumerate(values, start=1):
+                item = QTableWidgetItem()
+                item.setData(QtCore.Qt.DisplayRole, round(value, 3))
+                self.tw_stats.setItem(row, column, item)
+
+        self.tw_stats.setSortingEnabled(True)
+
+    def export_triggered(self):
+        start_path = os.path.join(os.path.expanduser("~"), "quiltix_trace.json")
+        path = QFileDialog.getSaveFileName(self, "Export Chrome Trace", start_path, "Trace files (*.json)")[0]
+        if not path:
+            return
+
+        profiler.export_chrome_trace(path)
@@ -0,0 +1,82 @@
+import logging
+import time
+
+from qtpy import QtCore  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Maximum amount of redraws per second of the viewport
+DEFAULT_MAX_FPS = 60
+
+
+class RedrawScheduler(QtCore.QObject):
+    def __init__(self, view, max_fps=DEFAULT_MAX_FPS, is_visible=None, parent=None):
+        """Coalesces redraw requests of a view and caps the redraws to a frame rate.
+        Redraws are skipped while the view is not visible, Qt repaints it anyway once it gets exposed again.
+
+        Args:
+            view (object): view to redraw. Needs an updateGL method.
+            max_fps (float): maximum amount of redraws per second.
+            is_visible (callable, optional): returns whether the view is visible.
+                Defaults to checking the visibility of the view and whether its window is minimized.
+            parent (QObject, optional): parent object.
+        """
+        super(RedrawScheduler, self).__init__(parent)
+        self.view = view
+        self.max_fps = max_fps
+        self._is_visible = is_visible or self._is_view_visible
+        self._pending = False
+        self._last_redraw_time = None
+        self._skipped_count = 0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    @property
+    def pending(self):
+        return self._pending
+
+    @property
+    def skipped_count(self):
+        """Amount of redraw requests which have been coalesced or skipped."""
+        return self._skipped_count
+
+    def set_max_fps(self, max_fps):
+        self.max_fps = max_fps
+
+    def request_redraw(self, *args):
+        if self._pending:
+            self._skipped_count += 1
+            return
+
+        self._pending = True
+        self._timer.start(int(self._get_time_until_next_frame() * 1000))
+
+    def _get_time_until_next_frame(self):
+        if self._last_redraw_time is None or not self.max_fps:
+            return 0
+
+        frame_time = 1.0 / self.max_fps
+        return max(0, frame_time - (time.perf_counter() - self._last_redraw_time))
+
+    def flush(self):
+        """Redraw the view now if a redraw has been requested."""
+        self._timer.stop()
+        if not self._pending:
+            return
+
+        self._pending = False
+        if not self._is_visible():
+            self._skipped_count += 1
+            return
+
+        self._last_redraw_time = time.perf_counter()
+        self.view.updateGL()
+
+    def _is_view_visible(self):
+        if not self.view.isVisible():
+            return False
+
+        window = self.view.window()
+        return not (window and window.isMinimized())
@@ -1,7 +1,6 @@
 import QuiltiX.qx_node as qx_node_module
 from QuiltiX.qx_nodegraph import QxNodeGraph
 
-from NodeGraphQt.base.commands import PortConnectedCmd
 from NodeGraphQt.base.menu import NodeGraphMenu
 from NodeGraphQt.constants import LayoutDirectionEnum, PortTypeEnum
 from NodeGraphQt.errors import NodeDeletionError
@@ -11,9 +10,6 @@ from NodeGraphQt.widgets.node_graph import SubGraphWidget
 from qtpy import QtWidgets  # type: ignore
 
 
-import copy
-
-
 class QxSubNodeGraph(QxNodeGraph):
     """
     The ``SubGraph`` class is just like the ``NodeGraph`` but is the main
@@ -54,14 +50,54 @@ class QxSubNodeGraph(QxNodeGraph):
             del self._widget
             del self._sub_graphs
 
-        # clone context menu from the parent node graph.
-        self._clone_context_menu_from_parent()
-
+        # custom start - clone the context menu from the parent node graph once it is needed
+        # self._clone_context_menu_from_parent()
+        self._is_context_menu_cloned = False
+        self._viewer.shown.connect(self._ensure_context_menu)
+        # custom end
 
     def __repr__(self):
         return '<{}("{}") object at {}>'.format(
             self.__class__.__name__, self._node.name(), hex(id(self)))
 
+    # custom start - share the mx containers of the root graph
+    @property
+    def mx_library_doc(self):
+        return self.get_root_graph().mx_library_doc
+
+    @mx_library_doc.setter
+    def mx_library_doc(self, value):
+        self.get_root_graph().mx_library_doc = value
+
+    @property
+    def mx_defs(self):
+        return self.get_root_graph().mx_defs
+
+    @mx_defs.setter
+    def mx_defs(self, value):
+        self.get_root_graph().mx_defs = value
+
+    @property
+    def mx_defs_diff(self):
+        return self.get_root_graph().mx_defs_diff
+
+    @mx_defs_diff.setter
+    def mx_defs_diff(self, value):
+        self.get_root_graph().mx_defs_diff = value
+    # custom end
+
+    def get_context_menu(self, menu):
+        self._ensure_context_menu()
+        return super(QxSubNodeGraph, self).get_context_menu(menu)
+
+    def _ensure_context_menu(self):
+        # Might be called while the base class is initialized
+        if getattr(self, "_is_context_menu_cloned", True):
+            return
+
+        self._is_context_menu_cloned = True
+        self._clone_context_menu_from_parent()
+
     def _register_builtin_nodes(self):
         """
         Register the default builtin nodes to the :meth:`NodeGraph.node_factory`
@@ -160,104 +196,19 @@ class QxSubNodeGraph(QxNodeGraph):
 
         return {input_node.name(): input_node}, {output_node.name(): output_node}
 
-    def _deserialize(self, data, relative_pos=False, pos=None):
+    def _get_deserialize_port_nodes(self):
         """
-        deserialize node data.
-        (used internally by the node graph)
-
-        Args:
-            data (dict): node data.
-            relative_pos (bool): position node relative to the cursor.
-            pos (tuple or list): custom x, y position.
-
         Returns:
-            list[NodeGraphQt.Nodes]: list of node instances.
+            dict: existing nodes used for deserialized nodes of a type {<node type>: {<node name>: node}}
         """
-        # update node graph properties.
-        for attr_name, attr_value in data.get('graph', {}).items():
-            if attr_name == 'acyclic':
-                self.set_acyclic(attr_value)
-            elif attr_name == 'pipe_collision':
-                self.set_pipe_collision(attr_value)
-
         # build the port input & output nodes here.
         input_nodes, output_nodes = self._build_port_nodes()
-
-        # build the nodes.
-        nodes = {}
-        for n_id, n_data in data.get('nodes', {}).items():
-            identifier = n_data['type_']
-            name = n_data.get('name')
-            if identifier == PortInputNode.type_:
-                nodes[n_id] = input_nodes[name]
-                nodes[n_id].set_pos(*(n_data.get('pos') or [0, 0]))
-                continue
-            elif identifier == "Inputs.QxPortInputNode":
-                nodes[n_id] = input_nodes[name]
-                nodes[n_id].set_pos(*(n_data.get('pos') or [0, 0]))
-                continue
-            elif identifier == PortOutputNode.type_:
-                nodes[n_id] = output_nodes[name]
-                nodes[n_id].set_pos(*(n_data.get('pos') or [0, 0]))
-                continue
-            elif identifier == "Outputs.QxPortOutputNode":
-                nodes[n_id] = output_nodes[name]
-                nodes[n_id].set_pos(*(n_data.get('pos') or [0, 0]))
-                continue
-
-            node = self._node_factory.create_node_instance(identifier)
-            if not node:
-                continue
-
-            node.NODE_NAME = name or node.NODE_NAME
-            # set properties.
-            for prop in node.model.properties.keys():
-                if prop in n_data.keys():
-                    node.model.set_property(prop, n_data[prop])
-
-            # set custom properties.
-            for prop, val in n_data.get('custom', {}).items():
-                # custom start
-                if prop == "type":
-                    node.change_type(val)
-                # custom end
-                node.model.set_property(prop, val)
-
-            nodes[n_id] = node
-            self.add_node(node, n_data.get('pos'))
-
-            if n_data.get('port_deletion_allowed', None):
-                node.set_ports({
-                    'input_ports': n_data['input_ports'],
-                    'output_ports': n_data['output_ports']
-                })
-
-        # build the connections.
-        for connection in data.get('connections', []):
-            nid, pname = connection.get('in', ('', ''))
-            in_node = nodes.get(nid)
-            if not in_node:
-                continue
-            in_port = in_node.inputs().get(pname) if in_node else None
-
-            nid, pname = connection.get('out', ('', ''))
-            out_node = nodes.get(nid)
-            if not out_node:
-                continue
-            out_port = out_node.outputs().get(pname) if out_node else None
-
-            if in_port and out_port:
-                self._undo_stack.push(PortConnectedCmd(in_port, out_port))
-
-        node_objs = list(nodes.values())
-        if relative_pos:
-            self._viewer.move_nodes([n.view for n in node_objs])
-            [setattr(n.model, 'pos', n.view.xy_pos) for n in node_objs]
-        elif pos:
-            self._viewer.move_nodes([n.view for n in node_objs], pos=pos)
-            [setattr(n.model, 'pos', n.view.xy_pos) for n in node_objs]
-
-        return node_objs
+        return {
+            PortInputNode.type_: input_nodes,
+            qx_node_module.QxPortInputNode.type_: input_nodes,
+            PortOutputNode.type_: output_nodes,
+            qx_node_module.QxPortOutputNode.type_: output_nodes,
+        }
 
     def _on_navigation_changed(self, node_id, rm_node_ids):
         """
@@ -491,7 +442,10 @@ class QxSubNodeGraph(QxNodeGraph):
             grp_sub_graph.collapse_graph(clear_session=False)
 
         # build new sub graph.
-        node_factory = copy.deepcopy(self.node_factory)
+        # custom start - share the node factory, so (re-)registered nodes are available in all graphs
+        # node_factory = copy.deepcopy(self.node_factory)
+        node_factory = self.node_factory
+        # custom end
 
         # custom start - replace supgraph
         sub_graph = QxSubNodeGraph(self,
@@ -513,6 +467,10 @@ class QxSubNodeGraph(QxNodeGraph):
         self.sub_graphs[node.id] = sub_graph
         self.initialized_graphs.append(sub_graph)
 
+        # custom start - build the content of nodegraphs which have not been expanded since loading
+        self.build_sub_graph_from_session(sub_graph, serialized_session)
+        # custom end
+
         return sub_graph
 
     def collapse_group_node(self, node):
@@ -1,3 +1,5 @@
+import fnmatch
+import functools
 import os
 import pathlib
 import logging
@@ -5,17 +7,32 @@ import logging
 from qtpy import QtCore # type: ignore
 
 from pxr import Usd, UsdLux, Sdf, Tf, UsdGeom,  UsdShade, Gf  # noqa: E402 # type: ignore
-from pxr.Usdviewq._usdviewq import Utils # type: ignore
 
 import MaterialX as mx
 
 from QuiltiX import mx_node
+from QuiltiX.qx_profiler import timed
 # TODO: decouple from QxNode
 from QuiltiX.qx_node import QxNode
 
 
 logger = logging.getLogger(__name__)
 
+# Which payloads get loaded when opening a stage
+LOAD_POLICY_ALL = "all"
+LOAD_POLICY_NONE = "none"
+# Only load payloads whose prim path matches a pattern, eg. "/set/hero_*"
+LOAD_POLICY_PATTERN = "pattern"
+# Amount of payloads loaded at once by the StageLoader. Every load recomposes the stage, so payloads are
+# loaded in chunks to keep the parallel composition of USD while still reporting progress.
+PAYLOAD_LOAD_CHUNK_SIZE = 256
+
+# Amount of HDRI stages kept in memory, so switching between a few HDRIs doesn't rebuild them
+HDRI_STAGE_CACHE_SIZE = 8
+
+# Name of the generated layer of each material partition of the graph
+GRAPH_LAYER_NAME_TEMPLATE = "_tmp_quiltix_graph_{}.mtlx"
+
 
 def set_pxr_mtlx_stdlib_search_paths():
     """Usd searches in PXR_MTLX_STDLIB_SEARCH_PATHS for the MaterialX standard library of nodes.
@@ -27,27 +44,50 @@ def set_pxr_mtlx_stdlib_search_paths():
     logger.info("stdlib loaded from: %s" % os.environ["PXR_MTLX_STDLIB_SEARCH_PATHS"])
 
 
-def get_stage_from_file(path):
+def get_stage_from_file(path, load_policy=LOAD_POLICY_ALL, load_pattern=None):
     if os.path.splitext(path)[1] == ".abc":
         stage = create_empty_stage()
         add_layer_to_stage_root(stage, path)
-    else:
+    elif load_policy == LOAD_POLICY_ALL:
         stage = Usd.Stage.Open(path, Usd.Stage.LoadAll)
+    else:
+        stage = Usd.Stage.Open(path, Usd.Stage.LoadNone)
+        stage.LoadAndUnload(set(get_payload_paths_to_load(stage, load_policy, load_pattern)), set())
 
     return stage
 
 
+def get_payload_paths_to_load(stage, load_policy=LOAD_POLICY_ALL, load_pattern=None):
+    """
+    Args:
+        stage (Usd.Stage): stage opened with Usd.Stage.LoadNone.
+        load_policy (str): one of the LOAD_POLICY_* constants.
+        load_pattern (str, optional): fnmatch pattern of the prim paths to load for LOAD_POLICY_PATTERN.
+
+    Returns:
+        list(Sdf.Path): paths of the prims to load with their descendants.
+    """
+    if load_policy == LOAD_POLICY_NONE:
+        return []
+
+    loadable_paths = list(stage.FindLoadable())
+    if load_policy == LOAD_POLICY_PATTERN:
+        loadable_paths = [path for path in loadable_paths if fnmatch.fnmatchcase(path.pathString, load_pattern or "")]
+
+    return Sdf.Path.RemoveDescendentPaths(loadable_paths)
+
+
 def create_empty_stage():
     return Usd.Stage.CreateInMemory()
 
 
-def create_stage_with_hdri(hdri_file_path, hdri_parent_path="/lights"):
+def create_stage_with_hdri(hdri_file_path, hdri_parent_path="/lights", texture_format="latlong"):
     stage = create_empty_stage()
     hdri_name = pathlib.Path(hdri_file_path).stem
     hdri_stage_path = "/".join((hdri_parent_path, hdri_name))
     hdri = UsdLux.DomeLight.Define(stage, Sdf.Path(hdri_stage_path))
     hdri.CreateTextureFileAttr(hdri_file_path)
-    hdri.CreateTextureFormatAttr("latlong")
+    hdri.CreateTextureFormatAttr(texture_format)
     prim = stage.GetPrimAtPath(Sdf.Path(hdri_stage_path))
     attr = prim.CreateAttribute("karma:light:renderlightgeo", Sdf.ValueTypeNames.Bool)
     attr.Set(True)
@@ -55,15 +95,221 @@ def create_stage_with_hdri(hdri_file_path, hdri_parent_path="/lights"):
     return stage
 
 
+def get_hdri_stage(hdri_file_path, texture_format="latlong"):
+    """Cached version of create_stage_with_hdri, keyed by the normalized path and the texture format."""
+    return _get_cached_hdri_stage(os.path.normpath(hdri_file_path), texture_format)
+
+
+@functools.lru_cache(maxsize=HDRI_STAGE_CACHE_SIZE)
+def _get_cached_hdri_stage(hdri_file_path, texture_format):
+    return create_stage_with_hdri(hdri_file_path, texture_format=texture_format)
+
+
 def add_layer_to_stage_root(stage, layer_path):
     root = stage.GetRootLayer()
     root.subLayerPaths.insert(0, layer_path)
 
 
+class StageLoader(QtCore.QThread):
+    """Opens a stage on a worker thread, so large files don't block the ui.
+    With LOAD_POLICY_ALL the stage is opened with all payloads at once. Otherwise it is opened without payloads,
+    the matching ones are then loaded in chunks to report progress and allow cancelling.
+    """
+
+    # int: loaded payload count, int: payload count (0 if unknown), str: message
+    progress_changed = QtCore.Signal(int, int, str)
+    stage_loaded = QtCore.Signal(object)
+    load_failed = QtCore.Signal(str)
+
+    def __init__(self, path, load_policy=LOAD_POLICY_ALL, load_pattern=None, parent=None):
+        super(StageLoader, self).__init__(parent)
+        self.path = path
+        self.load_policy = load_policy
+        self.load_pattern = load_pattern
+        self._cancelled = False
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        # Usd.Stage.Open itself can't be interrupted, cancelling takes effect in between chunks of payloads
+        self._cancelled = True
+
+    def run(self):
+        try:
+            stage = self._open_stage()
+        except Exception as e:
+            logger.exception(f"Failed to open stage {self.path}")
+            self.load_failed.emit(str(e))
+            return
+
+        if stage and not self._cancelled:
+            self.stage_loaded.emit(stage)
+
+    def _open_stage(self):
+        self.progress_changed.emit(0, 0, f"Opening {os.path.basename(self.path)}...")
+        if os.path.splitext(self.path)[1] == ".abc":
+            stage = create_empty_stage()
+            add_layer_to_stage_root(stage, self.path)
+            return stage
+        elif self.load_policy == LOAD_POLICY_ALL:
+            return Usd.Stage.Open(self.path, Usd.Stage.LoadAll)
+
+        stage = Usd.Stage.Open(self.path, Usd.Stage.LoadNone)
+        loadable_paths = get_payload_paths_to_load(stage, self.load_policy, self.load_pattern)
+        for index in range(0, len(loadable_paths), PAYLOAD_LOAD_CHUNK_SIZE):
+            if self._cancelled:
+                return
+
+            chunk = loadable_paths[index:index + PAYLOAD_LOAD_CHUNK_SIZE]
+            self.progress_changed.emit(index, len(loadable_paths), f"Loading {len(chunk)} payloads from {chunk[0]}...")
+            stage.LoadAndUnload(set(chunk), set())
+
+        return stage
+
+
+def _has_ancestor_in_paths(path, paths):
+    # includes the path itself
+    while path != Sdf.Path.absoluteRootPath and not path.isEmpty:
+        if path in paths:
+            return True
+
+        path = path.GetParentPath()
+
+    return False
+
+
+def get_layer_spec_paths(layer):
+    spec_paths = []
+    layer.Traverse(Sdf.Path.absoluteRootPath, spec_paths.append)
+    return spec_paths
+
+
+def _get_owning_spec_path(path):
+    # Specs below properties (eg. connection or relationship targets) are diffed as part of their property
+    while not path.IsPropertyPath() and path.GetParentPath().IsPropertyPath():
+        path = path.GetParentPath()
+
+    return path
+
+
+def _get_spec_info(spec):
+    return {key: spec.GetInfo(key) for key in spec.ListInfoKeys()}
+
+
+def _sync_spec_info(source_spec, target_spec):
+    source_info = _get_spec_info(source_spec)
+    for key in target_spec.ListInfoKeys():
+        if key not in source_info:
+            target_spec.ClearInfo(key)
+
+    for key, value in source_info.items():
+        if not target_spec.HasInfo(key) or target_spec.GetInfo(key) != value:
+            target_spec.SetInfo(key, value)
+
+
+def _get_child_order_edits(source_spec, target_spec):
+    """Returns the Sdf.NamespaceEdits which reorder the children of target_spec like those of source_spec.
+    The edits can only be applied once both specs have the same children.
+    """
+    path = source_spec.path
+    edits = []
+    for source_names, target_names, get_child_path in (
+        (source_spec.nameChildren.keys(), target_spec.nameChildren.keys(), path.AppendChild),
+        (source_spec.properties.keys(), target_spec.properties.keys(), path.AppendProperty),
+    ):
+        if list(source_names) == list(target_names):
+            continue
+
+        # Moving the children to their index in turn leaves the ones before them in place
+        for index, name in enumerate(source_names):
+            edits.append(Sdf.NamespaceEdit.Reorder(get_child_path(name), index))
+
+    return edits
+
+
+def apply_layer_diff(source_layer, target_layer):
+    """Make the contents of target_layer match source_layer by only editing the specs which differ,
+    including the order of prim children and properties.
+    All edits are made in a single Sdf.ChangeBlock, so only the changed specs get recomposed.
+
+    Returns:
+        tuple(list(Sdf.Path)): paths of the added, removed and changed specs.
+    """
+    source_paths = {}
+    for path in get_layer_spec_paths(source_layer):
+        source_paths.setdefault(_get_owning_spec_path(path), set()).add(path)
+
+    target_paths = {}
+    for path in get_layer_spec_paths(target_layer):
+        target_paths.setdefault(_get_owning_spec_path(path), set()).add(path)
+
+    # Copying or removing a spec includes its descendants
+    added_paths = Sdf.Path.RemoveDescendentPaths([path for path in source_paths if path not in target_paths])
+    removed_paths = Sdf.Path.RemoveDescendentPaths([path for path in target_paths if path not in source_paths])
+
+    changed_paths = []
+    for path, source_spec_paths in source_paths.items():
+        if path not in target_paths:
+            continue
+
+        source_spec = source_layer.GetObjectAtPath(path)
+        target_spec = target_layer.GetObjectAtPath(path)
+        if path.IsPropertyPath():
+            # properties are replaced as a whole, including their connections and targets
+            if source_spec_paths != target_paths[path] or _get_spec_info(source_spec) != _get_spec_info(target_spec):
+                changed_paths.append(path)
+        elif _get_spec_info(source_spec) != _get_spec_info(target_spec):
+            changed_paths.append(path)
+
+    # Added specs are appended to their parent, so the order can only be compared once they are copied
+    reorder_parent_paths = {path.GetParentPath() for path in added_paths}
+    for path in source_paths:
+        if path in target_paths and not path.IsPropertyPath() and _get_child_order_edits(
+            source_layer.GetObjectAtPath(path), target_layer.GetObjectAtPath(path)
+        ):
+            reorder_parent_paths.add(path)
+
+    if not added_paths and not removed_paths and not changed_paths and not reorder_parent_paths:
+        return added_paths, removed_paths, changed_paths
+
+    with Sdf.ChangeBlock():
+        if removed_paths:
+            edit = Sdf.BatchNamespaceEdit()
+            for path in removed_paths:
+                edit.Add(Sdf.NamespaceEdit.Remove(path))
+
+            target_layer.Apply(edit)
+
+        for path in added_paths:
+            Sdf.CopySpec(source_layer, path, target_layer, path)
+
+        for path in changed_paths:
+            if path.IsPropertyPath():
+                Sdf.CopySpec(source_layer, path, target_layer, path)
+            else:
+                _sync_spec_info(source_layer.GetObjectAtPath(path), target_layer.GetObjectAtPath(path))
+
+        edit = Sdf.BatchNamespaceEdit()
+        for path in reorder_parent_paths:
+            for child_edit in _get_child_order_edits(
+                source_layer.GetObjectAtPath(path), target_layer.GetObjectAtPath(path)
+            ):
+                edit.Add(child_edit)
+
+        if edit.edits:
+            target_layer.Apply(edit)
+
+    return added_paths, removed_paths, changed_paths
+
+
 class MxStageController(QtCore.QObject):
 
     signal_stage_changed = QtCore.Signal(object)
     signal_stage_updated = QtCore.Signal()
+    # A parameter could not be written to the stage, the graph layers need to be rebuilt
+    signal_parameter_update_failed = QtCore.Signal()
 
     def __init__(
         self,
@@ -71,12 +317,23 @@ class MxStageController(QtCore.QObject):
         stage=None,
     ):
         super(MxStageController, self).__init__()
-        self.added_layers = []
         self.editor = editor
         self.applied_material = None
+        self.stage = None
+        self._stage_listener = None
+        # Cached paths of all UsdGeom.Gprims of the stage. None if they need to be fully collected again
+        self._geo_prim_paths = None
+        self._pending_geo_resync_paths = set()
+        # The translated graph is partitioned by material. Every partition has its own layer, which is created once
+        # and whose contents are replaced in place, so editing one material doesn't touch the other materials.
+        self._graph_layers = {}
+        self._graph_layer_data = {}
+        self._graph_layer_dir = None
+        self._graph_mx_data = None
 
     def set_stage(self, stage):
         self.stage = stage
+        self._register_stage_listener()
         self.stage_root = self.stage.GetRootLayer()
         self.stage.SetEditTarget(Usd.EditTarget(self.stage.GetSessionLayer()))
 
@@ -90,19 +347,71 @@ class MxStageController(QtCore.QObject):
             self._assignments_layer = Sdf.Layer.CreateNew(self._assignments_idf)
 
         self.stage_root.subLayerPaths.insert(0, self._assignments_idf)
+        self._add_graph_layers_to_stage()
+
         self.signal_stage_changed.emit(self.stage)
 
+    def _register_stage_listener(self):
+        if self._stage_listener:
+            self._stage_listener.Revoke()
+
+        self._stage_listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, self.stage)
+        self._geo_prim_paths = None
+        self._pending_geo_resync_paths = set()
+
+    def _on_objects_changed(self, notice, stage):
+        if stage != self.stage or self._geo_prim_paths is None:
+            return
+
+        # Only resynced prims can add, remove or retype gprims. Property resyncs
+        # like material bindings are ignored.
+        for path in notice.GetResyncedPaths():
+            if path == Sdf.Path.absoluteRootPath:
+                self._geo_prim_paths = None
+                self._pending_geo_resync_paths = set()
+                return
+            elif path.IsPrimPath():
+                self._pending_geo_resync_paths.add(path)
+
+    def _update_geo_prim_paths(self):
+        if self._geo_prim_paths is None:
+            self._pending_geo_resync_paths = set()
+            self._geo_prim_paths = set(self._collect_geo_prim_paths(self.stage.GetPseudoRoot()))
+            return
+
+        if not self._pending_geo_resync_paths:
+            return
+
+        resynced_paths = set(Sdf.Path.RemoveDescendentPaths(list(self._pending_geo_resync_paths)))
+        self._pending_geo_resync_paths = set()
+        self._geo_prim_paths = {
+            path for path in self._geo_prim_paths if not _has_ancestor_in_paths(path, resynced_paths)
+        }
+        for resynced_path in resynced_paths:
+            prim = self.stage.GetPrimAtPath(resynced_path)
+            if prim:
+                self._geo_prim_paths.update(self._collect_geo_prim_paths(prim))
+
+    def _collect_geo_prim_paths(self, root_prim):
+        gprim_type = Tf.Type.Find(UsdGeom.Gprim)
+        prim_range = Usd.PrimRange(root_prim, Usd.TraverseInstanceProxies())
+        return [prim.GetPath() for prim in prim_range if prim.IsA(gprim_type)]
+
     def get_all_geo_prims(self):
-        return Utils._GetAllPrimsOfType(self.stage, Tf.Type.Find(UsdGeom.Gprim))
+        """Returns all UsdGeom.Gprims of the stage. The paths are cached and only the subtrees of
+        resynced prims are traversed again.
+        """
+        self._update_geo_prim_paths()
+        prims = [self.stage.GetPrimAtPath(path) for path in sorted(self._geo_prim_paths)]
+        return [prim for prim in prims if prim]
 
     def apply_first_material_to_all_prims(self):
-        mx_data = self.editor.qx_node_graph.get_mx_xml_data_from_graph()
-        if not mx_data:
+        # The graph doc is memoized per graph revision and only read here, so it is not copied
+        mx_doc = self.editor.qx_node_graph._get_memoized_mx_graph_doc()
+        if not mx_doc:
             return
 
-        tmp_mx_doc = mx.createDocument()
-        mx.readFromXmlString(tmp_mx_doc, mx_data)
-        if mx_doc_materials := tmp_mx_doc.getMaterials():
+        if mx_doc_materials := mx_doc.getMaterials():
             first_mx_material_name = mx_doc_materials[0].getName()
         else:
             # TODO: error out
@@ -111,34 +420,114 @@ class MxStageController(QtCore.QObject):
         prims = self.get_all_geo_prims()
         self.apply_material_to_prims(first_mx_material_name, prims)
 
+    def _get_graph_layer_dir(self, in_memory):
+        """
+        Returns:
+            str: directory of the graph layers, None if they can be anonymous.
+        """
+        if not in_memory:
+            return os.environ["TEMP"]
+
+        cur_path = self.editor.current_filepath if self.editor else None
+        if cur_path and cur_path != "untitled":
+            # allows relative filepaths
+            return os.path.dirname(cur_path)
+
+    def _create_graph_layer(self, partition_name, mx_data, in_memory):
+        layer_name = GRAPH_LAYER_NAME_TEMPLATE.format(partition_name)
+        if in_memory:
+            layer = Sdf.Layer.CreateAnonymous(layer_name)
+            if self._graph_layer_dir:
+                layer.identifier = os.path.join(self._graph_layer_dir, layer_name)
+        else:
+            layer_path = os.path.join(self._graph_layer_dir, layer_name)
+            layer = Sdf.Layer.Find(layer_path)
+            if not layer:
+                with open(layer_path, "w") as f:
+                    f.write(mx_data)
+
+                return Sdf.Layer.FindOrOpen(layer_path)
+
+        self._write_graph_layer(layer, mx_data, in_memory)
+        return layer
+
+    def _write_graph_layer(self, layer, mx_data, in_memory):
+        if not in_memory:
+            # only written for debugging, the layer itself is updated from the translated data
+            with open(layer.realPath, "w") as f:
+                f.write(mx_data)
+
+        # Translate into a scratch layer and only apply the differences, so Hydra only resyncs changed shaders
+        translated_layer = Sdf.Layer.CreateAnonymous(GRAPH_LAYER_NAME_TEMPLATE.format("translated"))
+        translated_layer.ImportFromString(mx_data)
+        added_paths, removed_paths, changed_paths = apply_layer_diff(translated_layer, layer)
+        logger.debug(
+            f"Updated {layer.identifier}: {len(added_paths)} added, {len(removed_paths)} removed, "
+            f"{len(changed_paths)} changed specs"
+        )
+
+    def _add_graph_layers_to_stage(self):
+        sub_layer_paths = self.stage_root.subLayerPaths
+        for layer in self._graph_layers.values():
+            if layer.identifier not in sub_layer_paths:
+                sub_layer_paths.insert(0, layer.identifier)
+
+    def _remove_graph_layer(self, partition_name):
+        layer = self._graph_layers.pop(partition_name)
+        self._graph_layer_data.pop(partition_name, None)
+        if self.stage and layer.identifier in self.stage_root.subLayerPaths:
+            self.stage_root.subLayerPaths.remove(layer.identifier)
+
+    @timed("refresh_mx_file")
     def refresh_mx_file(self, mx_data, emit=True):
-        for layer in self.added_layers:
-            self.stage_root.subLayerPaths.remove(layer)
-            self.added_layers.remove(layer)
+        in_memory = os.getenv("QUILTIX_WRITE_TMP_TO_DISK", "0") == "0"
+        layer_dir = self._get_graph_layer_dir(in_memory)
+        if layer_dir != self._graph_layer_dir:
+            # The layers need new identifiers for relative filepaths to resolve
+            for partition_name in list(self._graph_layers):
+                self._remove_graph_layer(partition_name)
+
+            self._graph_layer_dir = layer_dir
+            self._graph_mx_data = None
+
+        if mx_data == self._graph_mx_data:
+            return
+
+        mx_doc = mx.createDocument()
+        mx.readFromXmlString(mx_doc, mx_data)
+        partitions_data = {
+            partition_name: mx.writeToXmlString(partition_doc)
+            for partition_name, partition_doc in mx_node.get_mx_material_partitions(mx_doc).items()
+        }
+        self._graph_mx_data = mx_data
+
+        changed_partitions = [
+            partition_name
+            for partition_name, partition_data in partitions_data.items()
+            if self._graph_layer_data.get(partition_name) != partition_data
+        ]
+        removed_partitions = [
+            partition_name for partition_name in self._graph_layers if partition_name not in partitions_data
+        ]
+        if not changed_partitions and not removed_partitions:
+            return
 
         self.stage.GetSessionLayer().Clear()
 
-        in_memory = os.getenv("QUILTIX_WRITE_TMP_TO_DISK", "0") == "0"
-        if in_memory:
-            idf = "_tmp_quiltix_graph.mtlx"
-            layer = Sdf.Layer.CreateAnonymous(idf)
-            cur_path = self.editor.current_filepath
-            if cur_path and cur_path != "untitled":
-                # allows relative filepaths
-                idf = os.path.join(os.path.dirname(cur_path), "_tmp_quiltix_graph.mtlx")
-                layer.identifier = idf
-
-            idf = layer.identifier
-            layer.ImportFromString(mx_data)
-        else:
-            tmp_mtlx_export_location = os.path.join(os.environ["TEMP"], "_tmp_quiltix_graph.mtlx")
-            with open(tmp_mtlx_export_location, "w") as f:
-                f.write(mx_data)
+        for partition_name in removed_partitions:
+            self._remove_graph_layer(partition_name)
 
-            idf = tmp_mtlx_export_location
+        for partition_name in changed_partitions:
+            partition_data = partitions_data[partition_name]
+            if partition_name in self._graph_layers:
+                self._write_graph_layer(self._graph_layers[partition_name], partition_data, in_memory)
+            else:
+                self._graph_layers[partition_name] = self._create_graph_layer(partition_name, partition_data, in_memory)
 
-        self.stage_root.subLayerPaths.insert(0, idf)
-        self.added_layers.append(idf)
+            self._graph_layer_data[partition_name] = partition_data
+
+        self._add_graph_layers_to_stage()
+        logger.debug(f"Regenerated graph layers: {changed_partitions}")
 
         if emit:
             # TODO: remove -- DEBUG purpose
@@ -147,16 +536,19 @@ class MxStageController(QtCore.QObject):
             # logger.debug(f"Refreshed mtlx: {tmp_usd_stage_export_location}")
             self.signal_stage_updated.emit()
 
+    @timed("update_parameter")
     def update_parameter(self, qx_node, property_name, property_value):
         property_name = QxNode.get_mx_input_name_from_property_name(qx_node, property_name)
 
         if not self.applied_material:
+            self.signal_parameter_update_failed.emit()
             return
         
         if qx_node.type_ == "Other.QxGroupNode":
             ng_name = qx_node.name()
             sub_graph = qx_node.get_sub_graph()
             if not sub_graph:
+                self.signal_parameter_update_failed.emit()
                 return
 
             in_port_node = sub_graph.get_input_port_nodes()[0]
@@ -183,12 +575,14 @@ class MxStageController(QtCore.QObject):
 
         if not prim.IsValid():
             logger.warning("invalid prim at path: " + mx_stage_path)
+            self.signal_parameter_update_failed.emit()
             return
 
         usdinput = UsdShade.Shader(prim).GetInput(property_name)
         attr = usdinput.GetAttr()
         if not attr.IsValid():
             logger.warning(f"Invalid attribute {property_name} on prim {mx_stage_path}")
+            self.signal_parameter_update_failed.emit()
             return
 
         if type(property_value) in [list, tuple]:
@@ -211,20 +605,56 @@ class MxStageController(QtCore.QObject):
             logger.warning("invalid material: " + mx_material_stage_path)
             return
 
-        material = UsdShade.Material.Get(self.stage, mx_material_stage_path)
-        prev_target = self.stage.GetEditTarget()
-        self.stage.SetEditTarget(Usd.EditTarget(self._assignments_layer))
-        for prim in prims:
-            prim.ApplyAPI(UsdShade.MaterialBindingAPI)
-            UsdShade.MaterialBindingAPI(prim).UnbindAllBindings()
-            UsdShade.MaterialBindingAPI(prim).Bind(material)
+        prims = [prim for prim in prims if prim]
+        if prims:
+            self.bind_material_to_prims(Sdf.Path(mx_material_stage_path), prims)
             self.applied_material = mx_material_stage_path
-            logger.info("applied material %s to %s" % (mx_material_stage_path, prim.GetPath()))
+            logger.info("applied material %s to %s prims" % (mx_material_stage_path, len(prims)))
 
-        self.stage.SetEditTarget(prev_target)
         self.signal_stage_updated.emit()
 
+    def bind_material_to_prims(self, material_path, prims):
+        """Author direct material bindings for all prims on the assignments layer in a single Sdf.ChangeBlock.
+        This is the batched equivalent of calling ApplyAPI, UnbindAllBindings and Bind for every prim,
+        but only sends one change notification.
+
+        Args:
+            material_path (Sdf.Path): path of the material to bind.
+            prims (list[Usd.Prim]): prims to bind the material to.
+        """
+        direct_binding_name = UsdShade.Tokens.materialBinding
+        binding_api_name = "MaterialBindingAPI"
+
+        # Collect the existing bindings first. The composed stage must not be queried inside the change block.
+        prim_binding_rel_names = []
+        for prim in prims:
+            rel_names = {
+                rel.GetName() for rel in prim.GetRelationships() if rel.GetName().startswith(direct_binding_name)
+            }
+            prim_binding_rel_names.append((prim.GetPath(), rel_names))
+
+        layer = self._assignments_layer
+        with Sdf.ChangeBlock():
+            for prim_path, rel_names in prim_binding_rel_names:
+                prim_spec = Sdf.CreatePrimInLayer(layer, prim_path)
+
+                api_schemas = prim_spec.GetInfo("apiSchemas") if prim_spec.HasInfo("apiSchemas") else Sdf.TokenListOp()
+                if binding_api_name not in api_schemas.prependedItems:
+                    api_schemas.prependedItems = list(api_schemas.prependedItems) + [binding_api_name]
+                    prim_spec.SetInfo("apiSchemas", api_schemas)
+
+                # Block all other bindings, like UsdShade.MaterialBindingAPI.UnbindAllBindings
+                for rel_name in rel_names - {direct_binding_name}:
+                    rel_spec = prim_spec.relationships.get(rel_name) or Sdf.RelationshipSpec(prim_spec, rel_name, False)
+                    rel_spec.targetPathList.ClearEditsAndMakeExplicit()
+
+                rel_spec = prim_spec.relationships.get(direct_binding_name)
+                if not rel_spec:
+                    rel_spec = Sdf.RelationshipSpec(prim_spec, direct_binding_name, False)
+
+                rel_spec.targetPathList.explicitItems = [material_path]
+
     def about_to_close(self):
-        for layer in self.added_layers:
-            self.stage_root.subLayerPaths.remove(layer)
-            self.added_layers.remove(layer)
+        for layer in self._graph_layers.values():
+            if layer.identifier in self.stage_root.subLayerPaths:
+                self.stage_root.subLayerPaths.remove(layer.identifier)
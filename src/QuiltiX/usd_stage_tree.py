@@ -3,73 +3,301 @@ import sys
 
 from qtpy import QtWidgets, QtCore, QtGui  # type: ignore
 
-from pxr import Usd, UsdGeom
+from pxr import Sdf, Tf, Usd, UsdGeom
 from QuiltiX import usd_stage
 from QuiltiX.constants import ROOT
+from QuiltiX.qx_profiler import timed
 
 EYE_VISABLE = os.path.join(ROOT, "resources", "icons", "eye_visible.svg")
 EYE_INVISABLE = os.path.join(ROOT, "resources", "icons", "eye_invisible.svg")
 
+NAME_COLUMN = 0
+VISIBILITY_COLUMN = 1
+VISIBILITY_ICON_SIZE = 14
 
-class PrimVisButton(QtWidgets.QToolButton):
+
+class PrimNode(object):
+    """Lightweight tree node of the stage tree model. Children are only created on demand."""
+
+    __slots__ = ("path", "name", "parent", "children", "fetched", "has_visibility", "visible", "loaded", "_row")
+
+    def __init__(self, prim, parent=None, row=0):
+        self.path = prim.GetPath()
+        self.name = prim.GetName()
+        self.parent = parent
+        self.children = []
+        # index in the children of the parent, kept up to date by the model when the children change
+        self._row = row
+        self.fetched = False
+        # FIXME: this will probably not work in all cases
+        self.has_visibility = bool(UsdGeom.Imageable(prim).GetVisibilityAttr())
+        self.visible = parent.visible if parent else True
+        # loading or unloading a prim resyncs it, so this doesn't need to be kept up to date
+        self.loaded = prim.IsLoaded()
+
+    def row(self):
+        return self._row
+
+    def update_child_rows(self, start=0):
+        for row in range(start, len(self.children)):
+            self.children[row]._row = row
+
+
+class UsdStageTreeModel(QtCore.QAbstractItemModel):
     def __init__(self, parent=None):
-        super(PrimVisButton, self).__init__()
-        self.setStyleSheet("padding: 0px; margin: 0px; background-color: rgba(255, 255, 255, 0);")
+        super(UsdStageTreeModel, self).__init__(parent)
+        self.stage = None
+        # Invisible root holding the node of the stage's pseudo root
+        self._root_node = None
+        self._path_to_node_map = {}
+
+    def set_stage(self, stage):
+        self.stage = stage
+        self.reset()
+
+    def reset(self):
+        self.beginResetModel()
+        self._path_to_node_map = {}
+        self._root_node = None
+        if self.stage:
+            pseudo_root = self.stage.GetPseudoRoot()
+            self._root_node = PrimNode(pseudo_root)
+            self._root_node.fetched = True
+            pseudo_root_node = PrimNode(pseudo_root, parent=self._root_node)
+            self._root_node.children.append(pseudo_root_node)
+            self._path_to_node_map[pseudo_root_node.path] = pseudo_root_node
+
+        self.endResetModel()
+
+    def node_from_index(self, index):
+        if index.isValid():
+            return index.internalPointer()
+
+        return self._root_node
+
+    def index_from_node(self, node, column=NAME_COLUMN):
+        if node is None or node is self._root_node:
+            return QtCore.QModelIndex()
+
+        return self.createIndex(node.row(), column, node)
+
+    def get_prim(self, index):
+        node = self.node_from_index(index)
+        if node is None or node is self._root_node:
+            return
+
+        return self.stage.GetPrimAtPath(node.path)
+
+    def _get_filtered_prim_children(self, prim):
+        return prim.GetFilteredChildren(Usd.PrimIsActive)
+
+    # region QAbstractItemModel
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        parent_node = self.node_from_index(parent)
+        if parent_node is None or row < 0 or row >= len(parent_node.children):
+            return QtCore.QModelIndex()
 
-        # TODO: only have one QIcon for all buttons
-        self.vis_icon = QtGui.QIcon(EYE_VISABLE)
-        self.invis_icon = QtGui.QIcon(EYE_INVISABLE)
+        return self.createIndex(row, column, parent_node.children[row])
 
-        self.vis = True
-        self.setIcon(self.vis_icon)
-        self.setFixedSize(14, 14)
-        # self.clicked.connect(self.toggle_visibility)
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
 
-    def toggle_visibility(self):
-        self.vis = not self.vis
-        self.update_vis_icon()
-        return self.vis
+        return self.index_from_node(index.internalPointer().parent)
 
-    def update_vis_icon(self):
-        if self.vis:
-            self.setIcon(self.vis_icon)
-        else:
-            self.setIcon(self.invis_icon)
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
 
-    def set_visibility(self, visibility):
-        self.vis = visibility
-        self.update_vis_icon()
-        return self.vis
+        node = self.node_from_index(parent)
+        if node is None:
+            return 0
 
+        return len(node.children)
 
-class PrimItemWidget(QtWidgets.QTreeWidgetItem):
-    def __init__(self, prim):
-        super(PrimItemWidget, self).__init__()
-        self.prim = prim
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 2
 
-    def data(self, column, role):
-        if column == 0:
-            if role == QtCore.Qt.DisplayRole:
-                return self.prim.GetName()
-                # return "foo"
-        return super().data(column, role)
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self.node_from_index(parent)
+        if node is None:
+            return False
 
+        if node.fetched:
+            return bool(node.children)
 
-class UsdStageTreeWidget(QtWidgets.QTreeWidget):
+        prim = self.stage.GetPrimAtPath(node.path)
+        return prim.IsValid() and next(iter(self._get_filtered_prim_children(prim)), None) is not None
+
+    def canFetchMore(self, parent):
+        node = self.node_from_index(parent)
+        return node is not None and not node.fetched
+
+    def fetchMore(self, parent):
+        node = self.node_from_index(parent)
+        if node is None or node.fetched:
+            return
+
+        node.fetched = True
+        prim = self.stage.GetPrimAtPath(node.path)
+        if not prim.IsValid():
+            return
+
+        child_prims = list(self._get_filtered_prim_children(prim))
+        if not child_prims:
+            return
+
+        self.beginInsertRows(parent, 0, len(child_prims) - 1)
+        for row, child_prim in enumerate(child_prims):
+            child_node = PrimNode(child_prim, parent=node, row=row)
+            node.children.append(child_node)
+            self._path_to_node_map[child_node.path] = child_node
+
+        self.endInsertRows()
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return
+
+        node = index.internalPointer()
+        if index.column() != NAME_COLUMN:
+            return
+
+        if role == QtCore.Qt.DisplayRole:
+            return node.name
+        elif role == QtCore.Qt.ForegroundRole and not node.loaded:
+            return QtGui.QBrush(QtGui.QColor(120, 120, 120))
+        elif role == QtCore.Qt.ToolTipRole and not node.loaded:
+            return f"{node.path} (unloaded)"
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+    # endregion QAbstractItemModel
+
+    def toggle_hierarchy_visibility(self, index, set_visibility_to=None):
+        node = self.node_from_index(index)
+        if node is None or node is self._root_node:
+            return
+
+        if set_visibility_to is None:
+            set_visibility_to = not node.visible
+
+        # TODO: hide stage prims
+        self._set_hierarchy_visibility(node, set_visibility_to)
+
+    def _set_hierarchy_visibility(self, node, visible):
+        node.visible = visible
+        vis_index = self.index_from_node(node, VISIBILITY_COLUMN)
+        self.dataChanged.emit(vis_index, vis_index)
+        for child_node in node.children:
+            self._set_hierarchy_visibility(child_node, visible)
+
+    def resync_path(self, path):
+        """Rebuild the node of the prim at path. Its children will be fetched again on demand.
+
+        Args:
+            path (Sdf.Path): path of the resynced prim.
+        """
+        parent_node = self._path_to_node_map.get(path.GetParentPath())
+        if parent_node is None or not parent_node.fetched:
+            # Not fetched yet, so the changes will be picked up once the parent gets expanded
+            return
+
+        parent_index = self.index_from_node(parent_node)
+        old_node = self._path_to_node_map.get(path)
+        if old_node is not None:
+            row = old_node.row()
+            self.beginRemoveRows(parent_index, row, row)
+            self._remove_node_from_map(old_node)
+            parent_node.children.pop(row)
+            parent_node.update_child_rows(row)
+            self.endRemoveRows()
+
+        prim = self.stage.GetPrimAtPath(path)
+        if not prim or not prim.IsActive():
+            return
+
+        parent_prim = self.stage.GetPrimAtPath(parent_node.path)
+        sibling_names = [child.GetName() for child in self._get_filtered_prim_children(parent_prim)]
+        if prim.GetName() not in sibling_names:
+            return
+
+        preceding_names = set(sibling_names[:sibling_names.index(prim.GetName())])
+        row = 0
+        for i, sibling_node in enumerate(parent_node.children):
+            if sibling_node.name in preceding_names:
+                row = i + 1
+
+        self.beginInsertRows(parent_index, row, row)
+        new_node = PrimNode(prim, parent=parent_node, row=row)
+        parent_node.children.insert(row, new_node)
+        parent_node.update_child_rows(row + 1)
+        self._path_to_node_map[new_node.path] = new_node
+        self.endInsertRows()
+
+    def _remove_node_from_map(self, node):
+        self._path_to_node_map.pop(node.path, None)
+        for child_node in node.children:
+            self._remove_node_from_map(child_node)
+
+
+class PrimVisDelegate(QtWidgets.QStyledItemDelegate):
+    """Draws the visibility toggle of a prim. All rows share the same pair of icons."""
+
+    _vis_icon = None
+    _invis_icon = None
+
+    @classmethod
+    def get_icon(cls, visible):
+        if cls._vis_icon is None:
+            cls._vis_icon = QtGui.QIcon(EYE_VISABLE)
+            cls._invis_icon = QtGui.QIcon(EYE_INVISABLE)
+
+        return cls._vis_icon if visible else cls._invis_icon
+
+    def _get_icon_rect(self, option):
+        rect = QtCore.QRect(0, 0, VISIBILITY_ICON_SIZE, VISIBILITY_ICON_SIZE)
+        rect.moveCenter(option.rect.center())
+        return rect
+
+    def paint(self, painter, option, index):
+        node = index.internalPointer()
+        if not node or not node.has_visibility:
+            return
+
+        self.get_icon(node.visible).paint(painter, self._get_icon_rect(option))
+
+    def sizeHint(self, option, index):
+        return QtCore.QSize(VISIBILITY_ICON_SIZE, VISIBILITY_ICON_SIZE)
+
+    def editorEvent(self, event, model, option, index):
+        node = index.internalPointer()
+        if not node or not node.has_visibility:
+            return False
+
+        if event.type() == QtCore.QEvent.MouseButtonRelease and event.button() == QtCore.Qt.LeftButton:
+            if self._get_icon_rect(option).contains(event.pos()):
+                model.toggle_hierarchy_visibility(index)
+                return True
+
+        return False
+
+
+class UsdStageTreeWidget(QtWidgets.QTreeView):
     def __init__(self, stage=None, parent=None):
         super(UsdStageTreeWidget, self).__init__(parent=parent)
-        # TODO: cleanup settings
-        __qtreewidgetitem = QtWidgets.QTreeWidgetItem()
-        __qtreewidgetitem.setText(0, "StagePath")
-        __qtreewidgetitem.setTextAlignment(2, QtCore.Qt.AlignLeading | QtCore.Qt.AlignVCenter)
-        self.setHeaderItem(__qtreewidgetitem)
-        self.setColumnCount(2)
-        self.header().setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.stage_model = UsdStageTreeModel(self)
+        self.setModel(self.stage_model)
+        self.vis_delegate = PrimVisDelegate(self)
+        self.setItemDelegateForColumn(VISIBILITY_COLUMN, self.vis_delegate)
+
         self.header().setStretchLastSection(False)
         self.header().setVisible(False)
-        self.header().setSectionResizeMode(
-            0, QtWidgets.QHeaderView.Stretch
-        )
+        self.header().setSectionResizeMode(NAME_COLUMN, QtWidgets.QHeaderView.Stretch)
+        self.header().setSectionResizeMode(VISIBILITY_COLUMN, QtWidgets.QHeaderView.Fixed)
         self.setFrameShape(QtWidgets.QFrame.NoFrame)
         self.setFrameShadow(QtWidgets.QFrame.Plain)
         self.setLineWidth(0)
@@ -77,70 +305,93 @@ class UsdStageTreeWidget(QtWidgets.QTreeWidget):
         self.setAlternatingRowColors(True)
         self.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.setUniformRowHeights(True)
-        self.setColumnWidth(1, 10)
-        self._prim_to_item_map = {}
+        self.setColumnWidth(VISIBILITY_COLUMN, VISIBILITY_ICON_SIZE + 6)
+        self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+
+        self._stage_listener = None
+        self._pending_resync_paths = set()
+        self.stage = None
         self.set_stage(stage)
 
     def set_stage(self, stage):
         self.stage = stage
+        self._register_stage_listener()
         self.refresh_tree()
 
-    def refresh_tree(self):
-        # mods = QtWidgets.QApplication.keyboardModifiers()
-        # if mods != QtCore.Qt.ControlModifier:
-        #     return
+    def _register_stage_listener(self):
+        if self._stage_listener:
+            self._stage_listener.Revoke()
+            self._stage_listener = None
 
-        self.clear()
-        if not self.stage:
-            return
+        self._pending_resync_paths = set()
+        if self.stage:
+            self._stage_listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, self.stage)
 
-        stage_root = self.stage.GetPseudoRoot()
-        invisible_root_item = self.invisibleRootItem()
-        self.populate_item_tree(stage_root, invisible_root_item)
-        self.expandToDepth(0)
+    def _on_objects_changed(self, notice, stage):
+        if stage != self.stage:
+            return
 
-    def create_item_from_prim(self, prim):
-        item = PrimItemWidget(prim)
-        item.emitDataChanged()
-        self._prim_to_item_map[prim] = item
-        return item
+        # Only resyncs of prims can change the hierarchy. Value changes and property resyncs
+        # (fe. material bindings) don't affect the tree.
+        resynced_paths = [path for path in notice.GetResyncedPaths() if path.IsAbsoluteRootOrPrimPath()]
+        if not resynced_paths:
+            return
 
-    def populate_item_tree(self, prim, parent_item):
-        created_item = self.create_item_from_prim(prim)
-        parent_item.addChild(created_item)
+        # Notices are sent for every single edit, so we collect them and update the tree once
+        # control returns to the event loop
+        if not self._pending_resync_paths:
+            QtCore.QTimer.singleShot(0, self._apply_pending_resyncs)
 
-        # FIXME: this will probably not work in all cases
-        if bool(UsdGeom.Imageable(prim).GetVisibilityAttr()):
-            vis_button = PrimVisButton(prim)
-            vis_button.clicked.connect(lambda: self.toggle_hierarchy_visibility(created_item))
-            self.setItemWidget(created_item, 1, vis_button)
+        self._pending_resync_paths.update(resynced_paths)
 
-        prim_children = self._get_filtered_prim_children(prim)
-        for prim_child in prim_children:
-            self.populate_item_tree(prim_child, created_item)
+    def _apply_pending_resyncs(self):
+        resynced_paths = self._pending_resync_paths
+        self._pending_resync_paths = set()
+        if not resynced_paths or not self.stage:
+            return
 
-        return created_item
+        if Sdf.Path.absoluteRootPath in resynced_paths:
+            self.refresh_tree()
+            return
 
-    def _get_filtered_prim_children(self, prim):
-        return prim.GetFilteredChildren(Usd.PrimIsActive)
+        # Resyncing a path resyncs its whole subtree, so descendants of other resynced paths can be skipped
+        for path in Sdf.Path.RemoveDescendentPaths(list(resynced_paths)):
+            self.stage_model.resync_path(path)
 
-    def toggle_hierarchy_visibility(self, item, set_visibility_to=None):
-        item_vis_button = self.itemWidget(item, 1)
-        if set_visibility_to is None:
-            set_visibility_to = item_vis_button.toggle_visibility()
-        else:
-            item_vis_button.set_visibility(set_visibility_to)
+    @timed("UsdStageTreeWidget.refresh_tree")
+    def refresh_tree(self):
+        self.stage_model.set_stage(self.stage)
+        if not self.stage:
+            return
 
-        # TODO: hide stage prims
+        self.expandToDepth(0)
 
-        for i in range(item.childCount()):
-            child_item = item.child(i)
-            self.toggle_hierarchy_visibility(child_item, set_visibility_to)
+    def toggle_hierarchy_visibility(self, index, set_visibility_to=None):
+        self.stage_model.toggle_hierarchy_visibility(index, set_visibility_to)
 
     def get_selected_prims(self):
-        items = self.selectedItems()
-        prims = [item.prim for item in items]
-        return prims
+        indexes = self.selectionModel().selectedRows(NAME_COLUMN)
+        prims = [self.stage_model.get_prim(index) for index in indexes]
+        return [prim for prim in prims if prim]
+
+    def show_context_menu(self, pos):
+        if not self.stage or not self.get_selected_prims():
+            return
+
+        menu = QtWidgets.QMenu(self)
+        menu.addAction("Load", self.load_selected_prims)
+        menu.addAction("Unload", self.unload_selected_prims)
+        menu.exec_(self.viewport().mapToGlobal(pos))
+
+    def load_selected_prims(self):
+        paths = {prim.GetPath() for prim in self.get_selected_prims()}
+        # a single call, so the stage only gets recomposed once
+        self.stage.LoadAndUnload(paths, set())
+
+    def unload_selected_prims(self):
+        paths = {prim.GetPath() for prim in self.get_selected_prims()}
+        self.stage.LoadAndUnload(set(), paths)
 
 
 if __name__ == "__main__":
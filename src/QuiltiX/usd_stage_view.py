@@ -2,7 +2,10 @@ import os
 import logging
 
 from QuiltiX.constants import ROOT
+from QuiltiX.qx_profiler import profiler
+from QuiltiX.qx_redraw_scheduler import RedrawScheduler
 from QuiltiX.usd_stage import set_pxr_mtlx_stdlib_search_paths
+from pxr import Gf, Sdf, Tf, Usd, UsdGeom  # type: ignore
 from pxr.Usdviewq.stageView import StageView # type: ignore
 
 from qtpy.QtCore import QSize  # type: ignore
@@ -10,10 +13,94 @@ from qtpy.QtCore import Qt, Signal  # type: ignore
 from qtpy.QtWidgets import QVBoxLayout, QWidget  # type: ignore
 
 set_pxr_mtlx_stdlib_search_paths()
-from QuiltiX.usd_stage import create_empty_stage, create_stage_with_hdri, get_stage_from_file # noqa: E402 
+from QuiltiX.usd_stage import create_empty_stage, get_hdri_stage, get_stage_from_file # noqa: E402 
 
 logger = logging.getLogger(__name__)
 
+HDRI_PARENT_PATH = "/lights"
+
+# Bounds are cached per prim down to this depth, so a change only recomputes the bounds of its branch
+BBOX_CACHE_DEPTH = 3
+# Property namespaces which don't affect the bounds of a prim
+BBOX_IGNORED_PROPERTY_NAMESPACES = ("material:", "inputs:", "outputs:", "primvars:", "info:")
+
+
+class StageBBoxCache(object):
+    def __init__(self, stage):
+        """World bounds of a stage, cached per branch and per (time code, purposes, use extents hint).
+        The cache listens to stage changes and only invalidates the branches of changed prims.
+        """
+        self.stage = stage
+        # {(time code, purposes, use extents hint): {Sdf.Path: Gf.BBox3d}}
+        self._bounds = {}
+        self._stage_listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, stage)
+
+    def revoke(self):
+        if self._stage_listener:
+            self._stage_listener.Revoke()
+            self._stage_listener = None
+
+    def compute_stage_bound(self, time_code, purposes, use_extents_hint=True):
+        # the value of the default time code is NaN, which can't be used as a key
+        time_key = None if time_code.IsDefault() else time_code.GetValue()
+        key = (time_key, tuple(purposes), use_extents_hint)
+        bounds = self._bounds.setdefault(key, {})
+        bbox_cache = UsdGeom.BBoxCache(time_code, purposes, useExtentsHint=use_extents_hint)
+        return self._compute_bound(self.stage.GetPseudoRoot(), 0, bounds, bbox_cache)
+
+    def _compute_bound(self, prim, depth, bounds, bbox_cache):
+        path = prim.GetPath()
+        if path in bounds:
+            return bounds[path]
+
+        if depth < BBOX_CACHE_DEPTH and not prim.IsA(UsdGeom.Boundable) and not prim.IsInstance():
+            bbox = Gf.BBox3d()
+            for child in prim.GetChildren():
+                bbox = Gf.BBox3d.Combine(bbox, self._compute_bound(child, depth + 1, bounds, bbox_cache))
+
+            # only leafs are cached, branches are cheap to combine
+            return bbox
+
+        bbox = bbox_cache.ComputeWorldBound(prim)
+        bounds[path] = bbox
+        return bbox
+
+    def _on_objects_changed(self, notice, stage):
+        changed_prim_paths = set(path.GetPrimPath() for path in notice.GetResyncedPaths())
+        for path in notice.GetChangedInfoOnlyPaths():
+            if path.IsPropertyPath() and path.name.startswith(BBOX_IGNORED_PROPERTY_NAMESPACES):
+                continue
+
+            changed_prim_paths.add(path.GetPrimPath())
+
+        if changed_prim_paths:
+            self.invalidate(changed_prim_paths)
+
+    def invalidate(self, paths):
+        """Drop the cached bounds of all prims which are ancestors or descendants of the given paths."""
+        for bounds in self._bounds.values():
+            for cached_path in list(bounds):
+                if any(cached_path.HasPrefix(path) or path.HasPrefix(cached_path) for path in paths):
+                    del bounds[cached_path]
+
+
+class QxStageDataModel(StageView.DefaultDataModel):
+    """Computes the bounds of the whole stage with a persistent StageBBoxCache,
+    instead of the bounding box cache which gets recreated every time the caches are cleared.
+    """
+
+    def __init__(self):
+        super(QxStageDataModel, self).__init__()
+        self.stage_bbox_cache = None
+
+    def computeWorldBound(self, prim):
+        if not self.stage_bbox_cache or not prim.IsPseudoRoot():
+            return super(QxStageDataModel, self).computeWorldBound(prim)
+
+        return self.stage_bbox_cache.compute_stage_bound(
+            self._bboxCache.GetTime(), self._bboxCache.GetIncludedPurposes(), self._bboxCache.GetUseExtentsHint()
+        )
+
 
 class StageViewWidget(QWidget):
     keyPressed = Signal(object, object)
@@ -23,17 +110,20 @@ class StageViewWidget(QWidget):
     def __init__(self, stage=None, window_title="USD Stageview"):
         super(StageViewWidget, self).__init__()
 
-        self.model = StageView.DefaultDataModel()
+        self.model = QxStageDataModel()
         self.model.viewSettings.showHUD = False
 
         self.view = StageView(dataModel=self.model)
+        # Stage updates can be requested for every tick of a slider, the scheduler caps and coalesces the redraws
+        self.redraw_scheduler = RedrawScheduler(self.view, parent=self)
 
         # [usdviewq] Workaround apparent PySide6 GL bug https://github.com/PixarAnimationStudios/OpenUSD/commit/abb175da3587d3e21111f0d0b753fb2dd965d7dc
         from OpenGL import GL
         oldPaintGL = StageView.paintGL
         def paintGLFix(self):
-            GL.glDepthMask(GL.GL_TRUE)
-            oldPaintGL(self)
+            with profiler.timer("StageView.paintGL"):
+                GL.glDepthMask(GL.GL_TRUE)
+                oldPaintGL(self)
 
         StageView.paintGL = paintGLFix
 
@@ -59,6 +149,13 @@ class StageViewWidget(QWidget):
         # if not stage:
         #     stage = create_empty_stage()
 
+        # The HDRI layer stays in the stage. Switching HDRIs only changes the reference of its /lights prim
+        # and toggling it only deactivates /lights, so neither recomposes the whole stage.
+        self.hdri_stage = None
+        self.hdri_layer = Sdf.Layer.CreateAnonymous("_tmp_quiltix_hdri.usda")
+        self.hdri_lights_spec = Sdf.CreatePrimInLayer(self.hdri_layer, HDRI_PARENT_PATH)
+        self.hdri_lights_spec.specifier = Sdf.SpecifierDef
+
         hdri_path = os.path.join(ROOT, "resources", "hdris", "dreifaltigkeitsberg_1k.hdr")
         self.set_hdri(hdri_path)
         if stage:
@@ -97,7 +194,11 @@ class StageViewWidget(QWidget):
         self.view.closeRenderer()
         self.view._dataModel.stage = None
         self.view._dataModel._clearCaches()
+        if self.model.stage_bbox_cache:
+            self.model.stage_bbox_cache.revoke()
+
         self.model.stage = stage
+        self.model.stage_bbox_cache = StageBBoxCache(stage) if stage else None
         self._stage = self.model.stage
         self._stage_root = self.get_stage_root()
         if add_hdri:
@@ -113,6 +214,9 @@ class StageViewWidget(QWidget):
         self.view.setUpdatesEnabled(True)
         self.view.updateView(resetCam=True, forceComputeBBox=True)
 
+    def request_redraw(self):
+        self.redraw_scheduler.request_redraw()
+
     def set_stage_from_file(self, file_path):
         stage = get_stage_from_file(file_path)
         self.set_stage(stage)
@@ -176,23 +280,21 @@ class StageViewWidget(QWidget):
 
         return renderer_plugin_map
 
-    def set_hdri(self, path):
-        was_enabled = False
-        if hasattr(self, "hdri_stage") and self.hdri_stage.GetRootLayer().identifier in self._stage_root.subLayerPaths:
-            self._stage_root.subLayerPaths.remove(self.hdri_stage.GetRootLayer().identifier)
-            was_enabled = True
-
-        self.hdri_stage = create_stage_with_hdri(path)
-        if was_enabled:
-            self.set_hdri_enabled(True)
+    def set_hdri(self, path, texture_format="latlong"):
+        self.hdri_stage = get_hdri_stage(path, texture_format)
+        self.hdri_lights_spec.referenceList.explicitItems = [
+            Sdf.Reference(self.hdri_stage.GetRootLayer().identifier, HDRI_PARENT_PATH)
+        ]
 
     def set_hdri_enabled(self, enabled):
+        if self._stage_root and self.hdri_layer.identifier not in self._stage_root.subLayerPaths:
+            self._stage_root.subLayerPaths.append(self.hdri_layer.identifier)
+
+        self.hdri_lights_spec.active = enabled
         if enabled:
-            self._stage_root.subLayerPaths.append(self.hdri_stage.GetRootLayer().identifier)
-            logger.info("added hdri to stage")
+            logger.info("enabled hdri")
         else:
-            self._stage_root.subLayerPaths.remove(self.hdri_stage.GetRootLayer().identifier)
-            logger.info("removed hdri from stage")
+            logger.info("disabled hdri")
 
         self.view.updateView(resetCam=False, forceComputeBBox=False)
 
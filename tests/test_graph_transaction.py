@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from QuiltiX.constants import ROOT
+
+
+@pytest.fixture
+def standard_surface_graph(quiltix_instance):
+    graph = quiltix_instance.qx_node_graph
+    graph.load_graph_from_mx_file(os.path.join(ROOT, "resources", "materials", "standard_surface.mtlx"))
+    return graph
+
+
+def _record(signal):
+    emissions = []
+    signal.connect(lambda *args: emissions.append(args))
+    return emissions
+
+
+def test_nested_transactions_commit_once(standard_surface_graph):
+    graph = standard_surface_graph
+    updates = _record(graph.mx_data_updated)
+
+    with graph.transaction() as outer_transaction:
+        with graph.transaction() as inner_transaction:
+            assert inner_transaction is outer_transaction
+            graph.create_node("Texture2d.image")
+            graph.update_mx_xml_data_from_graph()
+
+        graph.update_mx_xml_data_from_graph()
+        assert not updates
+
+    assert len(updates) == 1
+    assert graph.current_transaction is None
+
+
+def test_transaction_drops_properties_of_deleted_nodes(standard_surface_graph):
+    graph = standard_surface_graph
+    kept_node = graph.create_node("Texture2d.image")
+    deleted_node = graph.create_node("Texture2d.image")
+    parameter_changes = _record(graph.mx_parameter_changed)
+
+    with graph.transaction() as transaction:
+        kept_node.set_property("file", "kept.png")
+        deleted_node.set_property("file", "deleted.png")
+        graph.delete_node(deleted_node)
+        assert transaction.get_property_changes() == [(kept_node, "file", "kept.png")]
+        # the deletion already requested a full update
+        transaction.mx_data_update_requested = False
+
+    assert [change[0] for change in parameter_changes] == [kept_node]
+
+
+def test_blocked_transaction_does_not_commit(standard_surface_graph):
+    graph = standard_surface_graph
+    updates = _record(graph.mx_data_updated)
+    parameter_changes = _record(graph.mx_parameter_changed)
+    node = graph.get_node_by_name("Standard_surface")
+
+    with graph.block_save():
+        with graph.transaction() as transaction:
+            transaction.add_property(node, "base", 0.5)
+            transaction.mx_data_update_requested = True
+
+    assert not updates
+    assert not parameter_changes
+    assert graph.current_transaction is None
+
+
+def test_transaction_commits_on_exception(standard_surface_graph):
+    graph = standard_surface_graph
+    updates = _record(graph.mx_data_updated)
+
+    with pytest.raises(RuntimeError):
+        with graph.transaction():
+            with graph.transaction():
+                graph.create_node("Texture2d.image")
+                graph.update_mx_xml_data_from_graph()
+                raise RuntimeError("failed edit")
+
+    assert graph.current_transaction is None
+    assert graph._transaction_depth == 0
+    assert len(updates) == 1
+
+    # the next edit is not swallowed by a dangling transaction
+    graph.create_node("Texture2d.image")
+    graph.update_mx_xml_data_from_graph()
+    assert len(updates) == 2
@@ -0,0 +1,43 @@
+import os
+
+from QuiltiX.constants import ROOT
+from QuiltiX.qx_nodegraph import EDIT_TOPOLOGY_NEUTRAL
+
+
+def _load_standard_surface(editor):
+    editor.qx_node_graph.load_graph_from_mx_file(os.path.join(ROOT, "resources", "materials", "standard_surface.mtlx"))
+    return editor.qx_node_graph
+
+
+def test_forced_update_rebuilds_layers(quiltix_instance):
+    graph = _load_standard_surface(quiltix_instance)
+    updates = []
+    graph.mx_data_updated.connect(lambda *args: updates.append(args))
+
+    graph.update_mx_xml_data_from_graph()
+    assert not updates
+
+    graph.update_mx_xml_data_from_graph(force=True)
+    assert len(updates) == 1
+
+    quiltix_instance.set_stage(quiltix_instance.stage_ctrl.stage)
+    assert len(updates) == 2
+
+
+def test_unapplied_values_rebuild_layers(quiltix_instance):
+    graph = _load_standard_surface(quiltix_instance)
+    updates = []
+    graph.mx_data_updated.connect(lambda *args: updates.append(args))
+    node = graph.get_node_by_name("Standard_surface")
+
+    with graph.block_save():
+        node.set_property("base", 0.5)
+    graph.update_mx_xml_data_from_graph()
+    assert not updates
+
+    quiltix_instance.stage_ctrl.applied_material = None
+    with graph.block_save():
+        node.set_property("base", 0.25)
+    graph.update_mx_xml_data_from_graph()
+    assert len(updates) == 1
+    assert graph.classify_graph_edit() == EDIT_TOPOLOGY_NEUTRAL
@@ -0,0 +1,138 @@
+import pytest
+from pxr import Sdf
+
+from QuiltiX.usd_stage import apply_layer_diff
+
+SHADER_LAYER = """#usda 1.0
+
+def Scope "MaterialX"
+{
+    def Scope "Materials"
+    {
+        def Material "material"
+        {
+            token outputs:mtlx:surface.connect = </MaterialX/Materials/material/shader.outputs:out>
+            rel targets = </MaterialX/Materials/material/shader>
+
+            def Shader "shader"
+            {
+                uniform token info:id = "ND_standard_surface_surfaceshader"
+                float inputs:base = 1
+                color3f inputs:base_color = (0.8, 0.8, 0.8)
+                token outputs:out
+            }
+
+            def Shader "other_shader"
+            {
+                token outputs:out
+            }
+        }
+    }
+}
+"""
+
+
+def _create_layer(content):
+    layer = Sdf.Layer.CreateAnonymous(".usda")
+    layer.ImportFromString(content)
+    return layer
+
+
+def _change_value(layer):
+    layer.GetAttributeAtPath("/MaterialX/Materials/material/shader.inputs:base").default = 0.5
+
+
+def _add_prim(layer):
+    prim_spec = Sdf.CreatePrimInLayer(layer, "/MaterialX/Materials/material/added_shader")
+    prim_spec.specifier = Sdf.SpecifierDef
+    prim_spec.typeName = "Shader"
+    Sdf.AttributeSpec(prim_spec, "inputs:in", Sdf.ValueTypeNames.Float).default = 1.0
+
+
+def _remove_prim(layer):
+    edit = Sdf.BatchNamespaceEdit()
+    edit.Add(Sdf.NamespaceEdit.Remove("/MaterialX/Materials/material/other_shader"))
+    layer.Apply(edit)
+
+
+def _add_attribute(layer):
+    prim_spec = layer.GetPrimAtPath("/MaterialX/Materials/material/shader")
+    Sdf.AttributeSpec(prim_spec, "inputs:metalness", Sdf.ValueTypeNames.Float).default = 0.8
+
+
+def _remove_attribute(layer):
+    prim_spec = layer.GetPrimAtPath("/MaterialX/Materials/material/shader")
+    prim_spec.RemoveProperty(prim_spec.properties["inputs:base_color"])
+
+
+def _change_connection(layer):
+    attr_spec = layer.GetAttributeAtPath("/MaterialX/Materials/material.outputs:mtlx:surface")
+    attr_spec.connectionPathList.explicitItems = ["/MaterialX/Materials/material/other_shader.outputs:out"]
+
+
+def _change_relationship_targets(layer):
+    rel_spec = layer.GetRelationshipAtPath("/MaterialX/Materials/material.targets")
+    rel_spec.targetPathList.explicitItems = [
+        "/MaterialX/Materials/material/other_shader",
+        "/MaterialX/Materials/material/shader",
+    ]
+
+
+def _reorder_prims(layer):
+    edit = Sdf.BatchNamespaceEdit()
+    edit.Add(Sdf.NamespaceEdit.Reorder("/MaterialX/Materials/material/other_shader", 0))
+    layer.Apply(edit)
+
+
+def _reorder_properties(layer):
+    edit = Sdf.BatchNamespaceEdit()
+    edit.Add(Sdf.NamespaceEdit.Reorder("/MaterialX/Materials/material/shader.outputs:out", 0))
+    layer.Apply(edit)
+
+
+def _add_prim_in_front(layer):
+    _add_prim(layer)
+    edit = Sdf.BatchNamespaceEdit()
+    edit.Add(Sdf.NamespaceEdit.Reorder("/MaterialX/Materials/material/added_shader", 0))
+    layer.Apply(edit)
+
+
+def _change_prim_metadata(layer):
+    layer.GetPrimAtPath("/MaterialX/Materials/material/shader").kind = "component"
+
+
+@pytest.mark.parametrize(
+    "edit_func",
+    [
+        _change_value,
+        _add_prim,
+        _remove_prim,
+        _add_attribute,
+        _remove_attribute,
+        _change_connection,
+        _change_relationship_targets,
+        _reorder_prims,
+        _reorder_properties,
+        _add_prim_in_front,
+        _change_prim_metadata,
+    ],
+)
+@pytest.mark.parametrize("reverse", [False, True])
+def test_apply_layer_diff(edit_func, reverse):
+    source_layer = _create_layer(SHADER_LAYER)
+    edit_func(source_layer)
+    target_layer = _create_layer(SHADER_LAYER)
+    if reverse:
+        source_layer, target_layer = target_layer, source_layer
+
+    apply_layer_diff(source_layer, target_layer)
+
+    assert target_layer.ExportToString() == source_layer.ExportToString()
+
+
+def test_apply_layer_diff_without_changes():
+    source_layer = _create_layer(SHADER_LAYER)
+    target_layer = _create_layer(SHADER_LAYER)
+
+    assert apply_layer_diff(source_layer, target_layer) == ([], [], [])
+    assert target_layer.ExportToString() == source_layer.ExportToString()
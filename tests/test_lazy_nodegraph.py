@@ -0,0 +1,96 @@
+import os
+
+import MaterialX as mx
+
+from QuiltiX.constants import ROOT
+
+COPPER_MTLX = os.path.join(ROOT, "resources", "materials", "Copper_Old_1k_8b", "Copper_Old.mtlx")
+CONNECTION_ATTRIBUTES = ("nodename", "nodegraph", "output", "interfacename")
+
+
+def _get_exported_mx_node_graph(graph, name):
+    mx_doc = graph.get_current_mx_graph_doc()
+    for element in mx_doc.traverseTree():
+        if element.getCategory() == "nodegraph" and element.getName() == name:
+            return element
+
+
+def _get_connection(mx_port):
+    return tuple(mx_port.getAttribute(attribute) for attribute in CONNECTION_ATTRIBUTES)
+
+
+def _describe_mx_node_graph(mx_node_graph):
+    """Nodes and connections of a nodegraph, independent of the inputs which are written with their default values."""
+    return {
+        "nodes": {mx_node.getName(): (mx_node.getCategory(), mx_node.getType()) for mx_node in mx_node_graph.getNodes()},
+        "connections": {
+            (mx_node.getName(), mx_input.getName()): _get_connection(mx_input)
+            for mx_node in mx_node_graph.getNodes()
+            for mx_input in mx_node.getInputs()
+            if any(_get_connection(mx_input))
+        },
+        "outputs": {mx_output.getName(): _get_connection(mx_output) for mx_output in mx_node_graph.getOutputs()},
+        "interface": {mx_input.getName(): _get_connection(mx_input) for mx_input in mx_node_graph.getInputs()},
+    }
+
+
+def _create_mtlx_with_connected_nodegraph(path):
+    """Writes a nodegraph whose interface input is fed by a node outside of it."""
+    doc = mx.createDocument()
+    doc.addNode("constant", "outside_constant", "color3")
+    nodegraph = doc.addNodeGraph("NG_test")
+    nodegraph.addInput("in", "color3").setNodeName("outside_constant")
+    multiply = nodegraph.addNode("multiply", "inside_multiply", "color3")
+    multiply.addInput("in1", "color3").setInterfaceName("in")
+    nodegraph.addOutput("out", "color3").setNodeName(multiply.getName())
+    mx.writeToXmlFile(doc, str(path))
+
+
+def test_lazy_nodegraph_export_matches_expanded(quiltix_instance):
+    graph = quiltix_instance.qx_node_graph
+    graph.load_graph_from_mx_file(COPPER_MTLX)
+    node = graph.get_node_by_name("NG_Copper_Old")
+    assert not node.is_expanded
+    lazy_description = _describe_mx_node_graph(_get_exported_mx_node_graph(graph, "NG_Copper_Old"))
+
+    graph.expand_group_node(node)
+    expanded_description = _describe_mx_node_graph(_get_exported_mx_node_graph(graph, "NG_Copper_Old"))
+
+    assert lazy_description == expanded_description
+
+
+def test_expanded_nodegraph_edits_are_exported(quiltix_instance):
+    graph = quiltix_instance.qx_node_graph
+    graph.load_graph_from_mx_file(COPPER_MTLX)
+    node = graph.get_node_by_name("NG_Copper_Old")
+
+    sub_graph = graph.expand_group_node(node)
+    sub_graph.get_node_by_name("node_image_color3_9").set_property("file", "textures/edited.png")
+    mx_node_graph = _get_exported_mx_node_graph(graph, "NG_Copper_Old")
+    assert mx_node_graph.getNode("node_image_color3_9").getInputValue("file") == "textures/edited.png"
+
+    # the collapsed group node keeps the session of its sub graph
+    graph.collapse_group_node(node)
+    assert not node.is_expanded
+    mx_node_graph = _get_exported_mx_node_graph(graph, "NG_Copper_Old")
+    assert mx_node_graph.getNode("node_image_color3_9").getInputValue("file") == "textures/edited.png"
+
+
+def test_lazy_nodegraph_exports_current_interface_connections(quiltix_instance, tmp_path):
+    mtlx_path = tmp_path / "connected_nodegraph.mtlx"
+    _create_mtlx_with_connected_nodegraph(mtlx_path)
+    graph = quiltix_instance.qx_node_graph
+    graph.load_graph_from_mx_file(str(mtlx_path))
+    node = graph.get_node_by_name("NG_test")
+    in_port = node.get_input("in")
+
+    # the connection of the file is not part of the graph
+    assert not in_port.connected_ports()
+    assert not any(_get_connection(_get_exported_mx_node_graph(graph, "NG_test").getInput("in")))
+
+    in_port.connect_to(graph.get_node_by_name("outside_constant").get_output("out"))
+    assert any(_get_connection(_get_exported_mx_node_graph(graph, "NG_test").getInput("in")))
+
+    in_port.disconnect_from(in_port.connected_ports()[0])
+    assert not node.is_expanded
+    assert not any(_get_connection(_get_exported_mx_node_graph(graph, "NG_test").getInput("in")))
@@ -0,0 +1,40 @@
+import os
+
+from QuiltiX.qx_library_watcher import MxLibraryWatcher
+
+
+def test_library_watcher_reports_changed_files(qtbot, tmp_path):
+    existing_path = tmp_path / "existing.mtlx"
+    existing_path.write_text("<materialx />")
+    watcher = MxLibraryWatcher(get_search_paths=lambda: [str(tmp_path)])
+    assert watcher.check_for_changes() == []
+
+    added_path = tmp_path / "added.mtlx"
+    added_path.write_text("<materialx />")
+    (tmp_path / "ignored.txt").write_text("")
+    os.utime(existing_path, (0, 0))
+    assert watcher.check_for_changes() == sorted([str(added_path), str(existing_path)])
+
+    added_path.unlink()
+    with qtbot.waitSignal(watcher.libraries_changed) as blocker:
+        watcher.check_for_changes()
+
+    assert blocker.args == [[str(added_path)]]
+
+
+def test_library_watcher_ignores_later_search_paths(qtbot, tmp_path, monkeypatch):
+    library_dir = tmp_path / "library"
+    material_dir = tmp_path / "materials"
+    library_dir.mkdir()
+    material_dir.mkdir()
+    monkeypatch.setenv("PXR_MTLX_PLUGIN_SEARCH_PATHS", str(library_dir))
+    watcher = MxLibraryWatcher()
+
+    # opening a material file with embedded definitions adds its directory to the search paths
+    monkeypatch.setenv("PXR_MTLX_PLUGIN_SEARCH_PATHS", os.pathsep.join([str(library_dir), str(material_dir)]))
+    (material_dir / "material.mtlx").write_text("<materialx />")
+    assert watcher.check_for_changes() == []
+
+    watcher.add_library_path(str(material_dir))
+    (material_dir / "definition.mtlx").write_text("<materialx />")
+    assert watcher.check_for_changes() == [str(material_dir / "definition.mtlx")]
@@ -0,0 +1,59 @@
+import MaterialX as mx
+
+from QuiltiX.mx_node import (
+    UNASSIGNED_PARTITION_NAME,
+    get_changed_mx_input_paths,
+    get_mx_graph_signature,
+    get_mx_material_partitions,
+)
+
+
+def _create_doc_with_nodegraph_interface():
+    """Material whose shader reads a nodegraph, the nodegraph's interface input is fed by a node outside of it."""
+    doc = mx.createDocument()
+    constant = doc.addNode("constant", "outside_constant", "color3")
+    constant.setInputValue("value", mx.Color3(1, 0, 0))
+
+    nodegraph = doc.addNodeGraph("NG_test")
+    interface_input = nodegraph.addInput("in", "color3")
+    interface_input.setNodeName(constant.getName())
+    multiply = nodegraph.addNode("multiply", "inside_multiply", "color3")
+    multiply.addInput("in1", "color3").setInterfaceName("in")
+    nodegraph.addOutput("out", "color3").setNodeName(multiply.getName())
+
+    shader = doc.addNode("standard_surface", "shader", "surfaceshader")
+    base_color = shader.addInput("base_color", "color3")
+    base_color.setNodeGraphString(nodegraph.getName())
+    base_color.setOutputString("out")
+    material = doc.addNode("surfacematerial", "material", "material")
+    material.addInput("surfaceshader", "surfaceshader").setNodeName(shader.getName())
+    return doc
+
+
+def test_material_partition_follows_nodegraph_interface():
+    partitions = get_mx_material_partitions(_create_doc_with_nodegraph_interface())
+
+    assert UNASSIGNED_PARTITION_NAME not in partitions
+    assert partitions["material"].getNode("outside_constant")
+    assert partitions["material"].getNodeGraph("NG_test").getNode("inside_multiply")
+
+
+def test_mx_graph_signature():
+    doc = _create_doc_with_nodegraph_interface()
+    signature = get_mx_graph_signature(doc)
+
+    doc.getNode("outside_constant").setAttribute("xpos", "10")
+    assert get_mx_graph_signature(doc) == signature
+
+    doc.getNode("outside_constant").setInputValue("value", mx.Color3(0, 1, 0))
+    value_signature = get_mx_graph_signature(doc)
+    assert value_signature.topology_hash == signature.topology_hash
+    assert get_changed_mx_input_paths(signature.values, value_signature.values) == ["outside_constant/value"]
+
+    # rewiring the nodegraph interface and adding dangling nodes both change what is written to the stage
+    doc.addNode("constant", "other_constant", "color3")
+    dangling_signature = get_mx_graph_signature(doc)
+    assert dangling_signature.topology_hash != value_signature.topology_hash
+
+    doc.getNodeGraph("NG_test").getInput("in").setNodeName("other_constant")
+    assert get_mx_graph_signature(doc).topology_hash != dangling_signature.topology_hash
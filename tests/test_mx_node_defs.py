@@ -0,0 +1,49 @@
+import MaterialX as mx
+
+from QuiltiX.mx_node import diff_mx_node_defs, get_mx_node_def_map
+
+
+def _create_node_defs(names, source_uri):
+    doc = mx.createDocument()
+    for name in names:
+        doc.addNodeDef(name, "float", "qx_test")
+
+    doc.setSourceUri(source_uri)
+    return get_mx_node_def_map(doc.getNodeDefs())
+
+
+def test_diff_mx_node_defs():
+    previous = _create_node_defs(["ND_a", "ND_b"], "a.mtlx")
+    current = _create_node_defs(["ND_b", "ND_c"], "a.mtlx")
+    diff = diff_mx_node_defs(previous, current)
+
+    assert [mx_def.getName() for mx_def in diff.added] == ["ND_c"]
+    assert [mx_def.getName() for mx_def in diff.removed] == ["ND_a"]
+    assert diff.changed == []
+
+
+def test_diff_mx_node_defs_changed_source():
+    previous = _create_node_defs(["ND_a"], "a.mtlx")
+    current = _create_node_defs(["ND_a"], "b.mtlx")
+    diff = diff_mx_node_defs(previous, current)
+
+    assert diff.added == [] and diff.removed == []
+    assert [mx_def.getName() for mx_def in diff.changed] == ["ND_a"]
+
+
+def test_create_mx_def_lookups():
+    from QuiltiX.qx_node import QxNode
+
+    doc = mx.createDocument()
+    possible_mx_defs = {}
+    for mx_type in ["float", "color3", "vector3"]:
+        mx_def = doc.addNodeDef(f"ND_qx_test_{mx_type}", mx_type, "qx_test")
+        mx_def.addInput("in", mx_type)
+        possible_mx_defs[mx_type] = mx_def
+
+    lookups = QxNode.create_mx_def_lookups(possible_mx_defs)
+
+    assert lookups["mx_def_types_by_input_type"]["color3"] == ("color3",)
+    assert lookups["mx_def_types_by_output_type"]["vector3"] == ("vector3",)
+    assert lookups["mx_port_types"][("in", "in")] == ("float", "color3", "vector3")
+    assert lookups["mx_input_types"] == lookups["mx_output_types"] == {"float", "color3", "vector3"}
@@ -8,3 +8,18 @@ def test_create_all_available_nodes(qtbot):
 
 def test_create_standard_surface(qtbot):
     create_standard_surface()
+
+
+def test_nodes_share_mx_def_schema(quiltix_instance):
+    graph = quiltix_instance.qx_node_graph
+    first_node = graph.create_node("Texture2d.image")
+    second_node = graph.create_node("Texture2d.image")
+
+    schema = first_node.mx_def_schemas[first_node.current_mx_def_type]
+    assert [input_schema.name for input_schema in schema.inputs] == list(first_node.inputs())
+    assert first_node.mx_def_schemas is second_node.mx_def_schemas
+    assert second_node.get_mx_def_schema(second_node.current_mx_def_type) is schema
+
+    first_node.change_type("vector3")
+    assert first_node.current_mx_def_type == "vector3"
+    assert first_node.get_property("default") == (0, 0, 0)
@@ -0,0 +1,38 @@
+def _get_connections(nodes):
+    return {
+        (node.id, in_port.name(), out_port.node().id, out_port.name())
+        for node in nodes
+        for in_port in node.input_ports()
+        for out_port in in_port.connected_ports()
+    }
+
+
+def test_paste_is_a_single_undo_step(quiltix_instance):
+    graph = quiltix_instance.qx_node_graph
+    surf_node = graph.create_node("Pbr.standard_surface")
+    mat_node = graph.create_node("Material.surfacematerial")
+    mat_node.set_input(0, surf_node.get_output(0))
+    graph.copy_nodes([surf_node, mat_node])
+
+    undo_stack = graph.undo_stack()
+    undo_index = undo_stack.index()
+    pasted_nodes = graph.paste_nodes()
+    pasted_ids = [node.id for node in pasted_nodes]
+    pasted_connections = _get_connections(pasted_nodes)
+
+    assert len(pasted_nodes) == 2
+    assert undo_stack.index() == undo_index + 1
+    assert len(pasted_connections) == 1
+    pasted_in_id, _, pasted_out_id, _ = next(iter(pasted_connections))
+    assert {pasted_in_id, pasted_out_id} == set(pasted_ids)
+
+    undo_stack.undo()
+    assert not any(graph.get_node_by_id(node_id) for node_id in pasted_ids)
+    assert set(graph.all_nodes()) == {surf_node, mat_node}
+    assert [port.node() for port in surf_node.get_output(0).connected_ports()] == [mat_node]
+
+    undo_stack.redo()
+    redone_nodes = [graph.get_node_by_id(node_id) for node_id in pasted_ids]
+    assert all(redone_nodes)
+    assert _get_connections(redone_nodes) == pasted_connections
+    assert undo_stack.index() == undo_index + 1
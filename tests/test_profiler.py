@@ -0,0 +1,26 @@
+from QuiltiX.qx_profiler import Profiler
+
+
+def test_profiler_disabled_records_nothing():
+    profiler = Profiler(enabled=False)
+    with profiler.timer("stage"):
+        pass
+
+    assert profiler.get_stats() == {}
+    assert profiler.get_chrome_trace()["traceEvents"] == []
+
+
+def test_profiler_stats_and_chrome_trace():
+    profiler = Profiler(enabled=True)
+    for i in range(1, 101):
+        profiler.add_sample("stage", 0.0, i / 1000.0)
+
+    stats = profiler.get_stats()["stage"]
+    assert stats["count"] == 100
+    assert round(stats["p50"]) == 50
+    assert round(stats["p95"]) == 95
+
+    events = profiler.get_chrome_trace()["traceEvents"]
+    assert len(events) == 100
+    assert events[0]["name"] == "stage"
+    assert events[0]["ph"] == "X"
@@ -0,0 +1,15 @@
+def test_properties_bin_reuses_prop_widgets(quiltix_instance):
+    graph = quiltix_instance.qx_node_graph
+    properties_bin = quiltix_instance.properties
+    first_node = graph.create_node("Texture2d.image")
+    second_node = graph.create_node("Texture2d.image")
+    second_node.set_property("uaddressmode", "clamp")
+
+    properties_bin.add_node(first_node)
+    first_prop_widget = properties_bin.prop_widget(first_node)
+    properties_bin.add_node(second_node)
+    second_prop_widget = properties_bin.prop_widget(second_node)
+
+    assert second_prop_widget is first_prop_widget
+    assert second_prop_widget.node_id == second_node.id
+    assert second_prop_widget.get_widget("uaddressmode").get_value() == "clamp"
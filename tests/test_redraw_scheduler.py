@@ -0,0 +1,35 @@
+from QuiltiX.qx_redraw_scheduler import RedrawScheduler
+
+
+class StubView(object):
+    def __init__(self):
+        self.redraw_count = 0
+
+    def updateGL(self):
+        self.redraw_count += 1
+
+
+def test_redraw_requests_are_coalesced(qtbot):
+    view = StubView()
+    scheduler = RedrawScheduler(view, max_fps=30, is_visible=lambda: True)
+    for _ in range(100):
+        scheduler.request_redraw()
+
+    qtbot.waitUntil(lambda: view.redraw_count == 1)
+    assert scheduler.skipped_count == 99
+
+    # the next request has to wait for the next frame
+    scheduler.request_redraw()
+    assert scheduler.pending
+    assert view.redraw_count == 1
+    qtbot.waitUntil(lambda: view.redraw_count == 2)
+
+
+def test_redraws_are_skipped_while_hidden(qtbot):
+    view = StubView()
+    scheduler = RedrawScheduler(view, is_visible=lambda: False)
+    scheduler.request_redraw()
+    scheduler.flush()
+
+    assert view.redraw_count == 0
+    assert not scheduler.pending